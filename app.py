@@ -1,10 +1,10 @@
 from flask_cors import CORS
 from flask import Flask, request, jsonify, Response
-from werkzeug.utils import secure_filename
-from flask import send_file
-from io import BytesIO
+from werkzeug.exceptions import RequestEntityTooLarge
+from flask.json.provider import DefaultJSONProvider
 import logging
 import os
+import orjson
 from bson import ObjectId
 
 from profile_parser import parse_profile_input
@@ -22,7 +22,43 @@ from resume_renderer import render_resume_pdf
 from portfolio_generator import generate_portfolio
 from portfolio_repository import get_portfolio_by_id
 
+from db import init_db
+
+
+# ✅ JSON provider: orjson-backed jsonify. datetime is serialized natively
+# (ISO 8601); ObjectId falls through to _json_default. Routes can jsonify
+# repository documents directly.
+def _json_default(o):
+    if isinstance(o, ObjectId):
+        return str(o)
+    return DefaultJSONProvider.default(o)
+
+
+class ORJSONProvider(DefaultJSONProvider):
+    def _dump_bytes(self, obj) -> bytes:
+        option = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=_json_default, option=option)
+
+    def dumps(self, obj, **kwargs) -> str:
+        return self._dump_bytes(obj).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self._dump_bytes(obj), mimetype=self.mimetype)
+
+
 app = Flask(__name__)
+app.json = ORJSONProvider(app)
+
+# Reject oversized request bodies before multipart parsing (uploads are
+# spooled to disk by werkzeug and streamed into the parser)
+MAX_UPLOAD_BYTES = 10 * 1024 * 1024  # 10 MB
+app.config["MAX_CONTENT_LENGTH"] = MAX_UPLOAD_BYTES
 
 # ============================================================================
 # CORS CONFIGURATION - PRODUCTION CROSS-ORIGIN SETUP
@@ -80,29 +116,9 @@ CORS(
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# ✅ Ensure MongoDB indexes exist (idempotent)
+init_db()
 
-# ✅ Helper: Serialize MongoDB documents to JSON-safe format
-def _serialize_doc(doc):
-    """
-    Convert MongoDB document to JSON-serializable format.
-    Handles ObjectId and datetime conversions.
-    """
-    if not doc:
-        return doc
-    
-    if isinstance(doc, dict):
-        doc = dict(doc)
-        if "_id" in doc and isinstance(doc["_id"], ObjectId):
-            doc["_id"] = str(doc["_id"])
-        
-        # Convert datetime objects
-        for key in ["created_at", "updated_at"]:
-            if key in doc and hasattr(doc[key], "isoformat"):
-                doc[key] = doc[key].isoformat()
-        
-        return doc
-    
-    return doc
 
 # ------------------------------
 # Root & Documentation
@@ -152,12 +168,11 @@ def render_resume(resume_id):
     try:
         pdf_bytes, filename = render_resume_pdf(resume_id)
 
-        return send_file(
-            BytesIO(pdf_bytes),
-            mimetype="application/pdf",
-            as_attachment=True,
-            download_name="resume.pdf"
-        )
+        # The PDF is already in memory: send it as one body with a known
+        # Content-Length rather than re-reading it through a file wrapper
+        response = Response(pdf_bytes, mimetype="application/pdf")
+        response.headers["Content-Disposition"] = "attachment; filename=resume.pdf"
+        return response
 
     except ValueError as e:
         return jsonify({"error": str(e)}), 404
@@ -181,9 +196,10 @@ def ingest_profile_post():
     
     try:
         # ✅ Log incoming request
-        logger.info(f"[INGEST] Method: {request.method}")
-        logger.info(f"[INGEST] Headers: {dict(request.headers)}")
-        logger.info(f"[INGEST] Content-Type: {request.content_type}")
+        logger.info("[INGEST] Method: %s", request.method)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("[INGEST] Headers: %s", dict(request.headers))
+        logger.info("[INGEST] Content-Type: %s", request.content_type)
         
         # OPTIONS preflight is handled by Flask-CORS automatically.
         # This check is a defensive fallback in case Flask-CORS doesn't intercept.
@@ -191,10 +207,11 @@ def ingest_profile_post():
             # Flask-CORS will add the proper headers; just return 200
             return "", 200
         
-        # 1️⃣ Try JSON first (React / API clients)
-        json_data = request.get_json(silent=True)
+        # 1️⃣ Try JSON first (React / API clients). Route on Content-Type so
+        # form/multipart uploads never go through a JSON parse attempt.
+        json_data = request.get_json(silent=True) if request.is_json else None
         if json_data:
-            logger.info(f"[INGEST] Received JSON data")
+            logger.info("[INGEST] Received JSON data")
             profile_text = json_data.get("text", "").strip()
 
             # If frontend posted name/contact separately, prepend them to the text
@@ -214,55 +231,58 @@ def ingest_profile_post():
                 logger.warning("[INGEST] JSON received but 'text' field is empty")
                 return jsonify({"error": "Field 'text' is required and must not be empty"}), 400
             
-            logger.info(f"[INGEST] Text length: {len(profile_text)} characters")
+            logger.info("[INGEST] Text length: %s characters", len(profile_text))
         else:
             # 2️⃣ Try form text (HTML forms / legacy)
             profile_text = request.form.get("text", "").strip()
             if profile_text:
-                logger.info(f"[INGEST] Received form data, text length: {len(profile_text)}")
+                logger.info("[INGEST] Received form data, text length: %s", len(profile_text))
             else:
                 # 3️⃣ Try file upload
                 file = request.files.get("file")
                 if file:
-                    logger.info(f"[INGEST] Received file upload: {file.filename}")
+                    logger.info("[INGEST] Received file upload: %s", file.filename)
                     try:
+                        # The parser only routes on the extension and never
+                        # touches the filesystem, so no secure_filename pass
                         profile_text = parse_profile_input(
-                            file_bytes=file.read(),
-                            filename=secure_filename(file.filename)
+                            file_stream=file.stream,
+                            filename=file.filename
                         )
-                        logger.info(f"[INGEST] File parsed, text length: {len(profile_text)}")
+                        logger.info("[INGEST] File parsed, text length: %s", len(profile_text))
                     except Exception as e:
-                        logger.error(f"[INGEST] File parsing failed: {e}")
+                        logger.error("[INGEST] File parsing failed: %s", e)
                         return jsonify({"error": f"File parsing failed: {str(e)}"}), 400
                 else:
                     logger.error("[INGEST] No input provided (no JSON, form, or file)")
                     return jsonify({"error": "No input provided. Send 'text' field in JSON or form, or upload a file"}), 400
         
         # ✅ Parse and structure profile
-        logger.info(f"[INGEST] Parsing profile text...")
+        logger.info("[INGEST] Parsing profile text...")
         try:
             parsed_text = parse_profile_input(manual_text=profile_text)
-            logger.info(f"[INGEST] Profile parsed successfully")
+            logger.info("[INGEST] Profile parsed successfully")
         except Exception as e:
-            logger.error(f"[INGEST] Profile parsing error: {e}")
+            logger.error("[INGEST] Profile parsing error: %s", e)
             return jsonify({"error": f"Profile parsing failed: {str(e)}"}), 400
         
         # ✅ Structure and store
-        logger.info(f"[INGEST] Structuring and storing profile...")
+        logger.info("[INGEST] Structuring and storing profile...")
         try:
             profile = structure_and_store_profile(parsed_text, source="manual")
-            logger.info(f"[INGEST] Profile stored successfully with ID: {profile.get('_id')}")
+            logger.info("[INGEST] Profile stored successfully with ID: %s", profile.get('_id'))
         except Exception as e:
-            logger.error(f"[INGEST] Structuring/storage error: {e}")
+            logger.error("[INGEST] Structuring/storage error: %s", e)
             return jsonify({"error": f"Profile structuring failed: {str(e)}"}), 400
         
-        # ✅ Ensure JSON serializable
-        profile = _serialize_doc(profile)
-        logger.info(f"[INGEST] Response: {profile.get('_id')}")
+        logger.info("[INGEST] Response: %s", profile.get('_id'))
         return jsonify(profile), 201
     
+    except RequestEntityTooLarge:
+        logger.warning("[INGEST] Request body exceeds upload limit")
+        return jsonify({"error": "Upload exceeds 10 MB size limit"}), 413
     except Exception as e:
-        logger.exception(f"[INGEST] Unexpected error: {e}")
+        logger.exception("[INGEST] Unexpected error: %s", e)
         return jsonify({"error": f"Unexpected error: {str(e)}"}), 500
 
 
@@ -281,13 +301,11 @@ def generate_resume():
             job_description=job_description
         )
         
-        # ✅ Ensure JSON serializable
-        resume = _serialize_doc(resume)
         return jsonify(resume), 200
     except ValueError as e:
         return jsonify({"error": str(e)}), 404
     except Exception as e:
-        logger.exception(f"[RESUME_GENERATE] Error: {e}")
+        logger.exception("[RESUME_GENERATE] Error: %s", e)
         return jsonify({"error": str(e)}), 500
 
 
@@ -299,11 +317,9 @@ def get_profile(profile_id):
         profile = get_profile_by_id(profile_id)
         if not profile:
             return jsonify({"error": "Profile not found"}), 404
-        # ✅ Ensure JSON serializable
-        profile = _serialize_doc(profile)
         return jsonify(profile), 200
     except Exception as e:
-        logger.error(f"[GET_PROFILE] Error: {e}")
+        logger.error("[GET_PROFILE] Error: %s", e)
         return jsonify({"error": str(e)}), 400
 
 
@@ -311,11 +327,9 @@ def get_profile(profile_id):
 def profiles():
     try:
         profile_list = list_profiles()
-        # ✅ Ensure all profiles are JSON serializable
-        profile_list = [_serialize_doc(p) for p in profile_list]
         return jsonify(profile_list), 200
     except Exception as e:
-        logger.error(f"[LIST_PROFILES] Error: {e}")
+        logger.error("[LIST_PROFILES] Error: %s", e)
         return jsonify({"error": str(e)}), 500
 
 
@@ -323,14 +337,13 @@ def profiles():
 @app.route("/api/resume/<resume_id>")
 def get_resume(resume_id):
     try:
+        # Default projection keeps internal ATS data out of the API payload
         resume = get_resume_by_id(resume_id)
         if not resume:
             return jsonify({"error": "Resume not found"}), 404
-        # ✅ Ensure JSON serializable
-        resume = _serialize_doc(resume)
         return jsonify(resume), 200
     except Exception as e:
-        logger.error(f"[GET_RESUME] Error: {e}")
+        logger.error("[GET_RESUME] Error: %s", e)
         return jsonify({"error": str(e)}), 500
 
 
@@ -347,13 +360,11 @@ def ats_analyze(resume_id):
             return jsonify({"error": "job_description is required"}), 400
         
         report = analyze_resume(resume_id, job_description)
-        # ✅ Ensure JSON serializable
-        report = _serialize_doc(report)
         return jsonify(report), 200
     except ValueError as e:
         return jsonify({"error": str(e)}), 404
     except Exception as e:
-        logger.exception(f"[ATS_ANALYZE] Error: {e}")
+        logger.exception("[ATS_ANALYZE] Error: %s", e)
         return jsonify({"error": str(e)}), 500
 
 
@@ -387,8 +398,6 @@ def portfolio_generate():
             return jsonify({"error": "profile_id is required"}), 400
         
         portfolio = generate_portfolio(resume_id, profile_id)
-        # ✅ Ensure JSON serializable
-        portfolio = _serialize_doc(portfolio)
         return jsonify({
             "portfolio_id": portfolio["_id"],
             "created_at": portfolio.get("created_at")
@@ -396,7 +405,7 @@ def portfolio_generate():
     except ValueError as e:
         return jsonify({"error": str(e)}), 400
     except Exception as e:
-        logger.exception(f"[PORTFOLIO_GENERATE] Error: {e}")
+        logger.exception("[PORTFOLIO_GENERATE] Error: %s", e)
         return jsonify({
             "error": "Failed to generate portfolio",
             "detail": str(e)
@@ -432,7 +441,7 @@ def portfolio_download(portfolio_id):
         
         return response
     except Exception as e:
-        logger.exception(f"[PORTFOLIO_DOWNLOAD] Error: {e}")
+        logger.exception("[PORTFOLIO_DOWNLOAD] Error: %s", e)
         return jsonify({"error": str(e)}), 500
 
 @app.route("/__routes")
@@ -443,7 +452,8 @@ def show_routes():
 
 
 # ------------------------------
-# Entry
+# Entry (development server only; production runs under
+# gunicorn, see gunicorn.conf.py)
 # ------------------------------
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 5000))
@@ -14,17 +14,25 @@ CRITICAL INVARIANTS (NON-NEGOTIABLE):
 
 import os
 import re
+import time
 import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import List, Dict
+from itertools import filterfalse
+from typing import List, Dict, FrozenSet, Optional, Tuple
 
 from bson import ObjectId
 from dotenv import load_dotenv
+from pymongo import WriteConcern
 
 from resume_repository import get_resume_by_id
 from resume_schema import (
     validate_resume_schema,
-    extract_text_for_matching
+    extract_text_for_matching,
+    normalize_for_ats,
+    extract_keywords
 )
 
 logger = logging.getLogger(__name__)
@@ -36,72 +44,156 @@ logger = logging.getLogger(__name__)
 load_dotenv()
 from db import db
 
-ats_collection = db["ats_reports"]
+# Fire-and-forget writes: ATS reports are non-critical derived data
+ats_collection = db.get_collection(
+    "ats_reports",
+    write_concern=WriteConcern(w=0)
+)
+
+# Background writer: BSON encoding and the socket send for ATS reports
+# run off the request thread
+_ATS_WRITER = ThreadPoolExecutor(max_workers=2, thread_name_prefix="ats-writer")
+
+# -------------------------
+# Token expansion table
+# -------------------------
+
+# ATS token normalization: phrase -> replacement, applied in one regex pass
+_ATS_EXPANSIONS = {
+    "machine learning": "machine learning machine learning",
+    "artificial intelligence": "artificial intelligence ai",
+    "web development": "web development web",
+}
+_ATS_EXPANSION_RE = re.compile("|".join(map(re.escape, _ATS_EXPANSIONS)))
 
 # -------------------------
 # Utility functions
 # -------------------------
 
-def _normalize_text(text: str) -> str:
-    """Normalize text for keyword extraction."""
-    text = text.lower()
-    # Replace non-alphanumeric with spaces
-    text = re.sub(r"[^a-z0-9\s]", " ", text)
-    # Collapse multiple spaces
-    text = re.sub(r"\s+", " ", text)
-    return text.strip()
+def _expand_token(match: re.Match) -> str:
+    return _ATS_EXPANSIONS[match.group(0)]
 
 
-def _extract_keywords(text: str) -> List[str]:
+def _store_report(document: Dict) -> None:
     """
-    Extract potential ATS keywords from job description.
-    Returns list of unique keywords (3+ chars, non-stopword).
+    Persist an ATS report document (runs on _ATS_WRITER).
+    Failures are logged only; the report is derived data.
     """
-    text = _normalize_text(text)
-    words = text.split()
-
-    # Remove very common stopwords
-    stopwords = {
-        "and", "or", "the", "a", "an", "to", "for", "with",
-        "of", "in", "on", "at", "by", "from", "is", "are",
-        "as", "this", "that", "will", "be", "we", "you", "your",
-        "that's", "it's", "can", "could", "would", "should",
-        "have", "has", "do", "does", "did", "don", "doesn"
-    }
-
-    keywords = [w for w in words if len(w) > 2 and w not in stopwords]
-    return list(set(keywords))
+    try:
+        ats_collection.insert_one(document)
+    except Exception as e:
+        logger.warning(f"[ATS] Failed to store ATS report {document.get('_id')}: {e}")
 
 
 # -------------------------
-# Core ATS Analyzer
+# Resume tokenization
 # -------------------------
 
-def analyze_resume(resume_id: str, job_description: str) -> Dict:
+# Minimum normalized resume text length for a meaningful ATS analysis
+MIN_RESUME_TEXT_CHARS = 300
+
+
+def _resume_text_for_ats(resume_json: Dict, matching_text: Optional[str] = None) -> str:
     """
-    Analyze a resume against a job description.
-    
-    STRICT GUARANTEES:
-    - Uses CANONICAL resume schema only
-    - Validates resume before processing
-    - Asserts text extraction succeeds
-    - Fails loudly on any data integrity issue
+    Build the normalized, token-expanded resume text used for matching.
+    matching_text, when given, is extract_text_for_matching(resume_json)
+    already computed by the caller.
+    """
+    if matching_text is None:
+        # Extract CANONICAL text using schema module
+        matching_text = extract_text_for_matching(resume_json)
+    resume_text = normalize_for_ats(matching_text)
+
+    # 🔧 ATS TOKEN NORMALIZATION (CRITICAL) - single pass over the text
+    return _ATS_EXPANSION_RE.sub(_expand_token, resume_text)
+
+
+def build_resume_tokens(
+    resume_json: Dict,
+    matching_text: Optional[str] = None
+) -> Optional[List[str]]:
+    """
+    Precompute the ATS token list for a resume.
+
+    Called once at generation time and stored alongside the resume, so
+    analyze_resume can skip text extraction and normalization entirely.
 
     Args:
-        resume_id (str): MongoDB resume ID
-        job_description (str): Target job description
+        resume_json (dict): Validated canonical resume
+        matching_text (str | None): Precomputed extract_text_for_matching
+            output, to avoid walking the resume again
 
     Returns:
-        dict: ATS analysis report with matched/missing keywords
-        
+        Sorted unique tokens, or None if the resume text is too short
+        for ATS (analysis then fails loudly on the backfill path)
+    """
+    resume_text = _resume_text_for_ats(resume_json, matching_text)
+    if len(resume_text) <= MIN_RESUME_TEXT_CHARS:
+        return None
+    return sorted(set(resume_text.split()))
+
+
+# -------------------------
+# Resume loading (cached)
+# -------------------------
+
+# Seconds a loaded resume is reused before it is fetched again (0 disables)
+ATS_CACHE_TTL = int(os.environ.get("ATS_CACHE_TTL", "300"))
+ATS_CACHE_MAX_ENTRIES = 512
+
+# resume_id -> (expires_at, (resume_words, has_experience)), in LRU order
+_ATS_CACHE: "OrderedDict[str, tuple]" = OrderedDict()
+_ATS_CACHE_LOCK = threading.Lock()
+
+
+def _load_resume_for_ats(resume_id: str) -> Tuple[FrozenSet[str], bool]:
+    """
+    Cached _fetch_resume_for_ats. Each entry is reused for at most
+    ATS_CACHE_TTL seconds after it was fetched.
+    """
+    if ATS_CACHE_TTL <= 0:
+        return _fetch_resume_for_ats(resume_id)
+
+    now = time.monotonic()
+    with _ATS_CACHE_LOCK:
+        entry = _ATS_CACHE.get(resume_id)
+        if entry is not None:
+            if entry[0] > now:
+                _ATS_CACHE.move_to_end(resume_id)
+                return entry[1]
+            del _ATS_CACHE[resume_id]
+
+    value = _fetch_resume_for_ats(resume_id)
+
+    with _ATS_CACHE_LOCK:
+        _ATS_CACHE[resume_id] = (time.monotonic() + ATS_CACHE_TTL, value)
+        _ATS_CACHE.move_to_end(resume_id)
+        while len(_ATS_CACHE) > ATS_CACHE_MAX_ENTRIES:
+            _ATS_CACHE.popitem(last=False)
+    return value
+
+
+def _fetch_resume_for_ats(resume_id: str) -> Tuple[FrozenSet[str], bool]:
+    """
+    Fetch, validate and normalize a resume for ATS matching.
+
+    Repeated analyses against different JDs skip the MongoDB round-trip,
+    schema validation, text extraction and the token set build. Only
+    immutable results are cached (never the resume dict itself), and
+    failures raise and are never cached.
+
+    Returns:
+        (resume_words, has_experience) tuple
+
     Raises:
-        ValueError: If resume invalid, missing, or text extraction fails
+        ValueError: If resume missing or fails schema validation
     """
-    
-    logger.info(f"[ATS] Starting analysis for resume {resume_id}")
 
     # ✅ STEP 1: Fetch resume document from MongoDB
-    resume_doc = get_resume_by_id(resume_id)
+    resume_doc = get_resume_by_id(
+        resume_id,
+        projection={"resume": 1, "resume_tokens": 1}
+    )
     if not resume_doc:
         raise ValueError(f"Resume {resume_id} not found in database")
 
@@ -125,30 +217,17 @@ def analyze_resume(resume_id: str, job_description: str) -> Dict:
         logger.error(f"[ATS] Resume schema validation FAILED: {e}")
         raise ValueError(f"Resume failed schema validation: {e}")
 
-    # ✅ STEP 4: Extract keywords from job description
-    jd_keywords = _extract_keywords(job_description)
-    if not jd_keywords:
-        logger.warning(f"[ATS] No keywords extracted from job description")
-        jd_keywords = []
-
-    logger.info(f"[ATS] Extracted {len(jd_keywords)} keywords from JD: {jd_keywords[:10]}")
-
-    # ✅ STEP 5: Extract CANONICAL text using schema module
-    # STEP 5: Extract CANONICAL text using schema module
-    from resume_schema import normalize_for_ats
+    # ✅ STEP 4: Use tokens precomputed at generation time when available
+    resume_tokens = resume_doc.get("resume_tokens")
+    if resume_tokens:
+        logger.info(f"[ATS] Using {len(resume_tokens)} precomputed resume tokens")
+        return frozenset(resume_tokens), bool(resume_json.get("experience"))
 
-    resume_text = normalize_for_ats(
-        extract_text_for_matching(resume_json)
-    )
-
-
-    # 🔧 ATS TOKEN NORMALIZATION (CRITICAL)
-    resume_text = resume_text.replace("machine learning", "machine learning machine learning")
-    resume_text = resume_text.replace("artificial intelligence", "artificial intelligence ai")
-    resume_text = resume_text.replace("web development", "web development web")
+    # Backfill path: resumes stored before tokens were precomputed
+    resume_text = _resume_text_for_ats(resume_json)
 
     # CRITICAL ASSERTION
-    assert len(resume_text) > 300, (
+    assert len(resume_text) > MIN_RESUME_TEXT_CHARS, (
         f"Resume text too short ({len(resume_text)} chars). "
         f"First 200 chars: {resume_text[:200]}"
     )
@@ -157,20 +236,59 @@ def analyze_resume(resume_id: str, job_description: str) -> Dict:
     logger.info(f"[ATS] Extracted resume text ({len(resume_text)} chars)")
     logger.info(f"[ATS] Text preview: {resume_text[:300]}...")
 
-    # ✅ STEP 6: Perform WORD-BOUNDARY matching
     # Split text into words for exact word matching (not substring)
-    resume_words = set(resume_text.split())
+    return frozenset(resume_text.split()), bool(resume_json.get("experience"))
+
+
+# -------------------------
+# Core ATS Analyzer
+# -------------------------
+
+def analyze_resume(resume_id: str, job_description: str) -> Dict:
+    """
+    Analyze a resume against a job description.
+    
+    STRICT GUARANTEES:
+    - Uses CANONICAL resume schema only
+    - Validates resume before processing
+    - Asserts text extraction succeeds
+    - Fails loudly on any data integrity issue
+
+    Args:
+        resume_id (str): MongoDB resume ID
+        job_description (str): Target job description
+
+    Returns:
+        dict: ATS analysis report with matched/missing keywords
+        
+    Raises:
+        ValueError: If resume invalid, missing, or text extraction fails
+    """
+    
+    logger.info(f"[ATS] Starting analysis for resume {resume_id}")
+
+    # ✅ STEPS 1-4: Fetch, validate and normalize resume (cached per resume_id)
+    resume_words, has_experience = _load_resume_for_ats(resume_id)
+
+    # ✅ STEP 5: Extract keywords from job description
+    # Shared, cached extraction: the same JD is scored against many resumes
+    jd_keywords = extract_keywords(job_description)
+    if not jd_keywords:
+        logger.warning(f"[ATS] No keywords extracted from job description")
+        jd_keywords = []
+
+    logger.info(f"[ATS] Extracted {len(jd_keywords)} keywords from JD: {jd_keywords[:10]}")
 
-    matched = []
-    missing = []
+    # ✅ STEP 6: Perform WORD-BOUNDARY matching against cached resume tokens
+    # filter/filterfalse over the set's __contains__ run the partition in C
+    # while keeping JD order
+    is_in_resume = resume_words.__contains__
+    matched = list(filter(is_in_resume, jd_keywords))
+    missing = list(filterfalse(is_in_resume, jd_keywords))
 
-    for kw in jd_keywords:
-        if kw in resume_words:
-            matched.append(kw)
-            logger.info(f"[ATS]   ✓ Matched: '{kw}'")
-        else:
-            missing.append(kw)
-            logger.info(f"[ATS]   ✗ Missing: '{kw}'")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("[ATS]   ✓ Matched: %s", ", ".join(matched))
+        logger.debug("[ATS]   ✗ Missing: %s", ", ".join(missing))
 
     # ✅ STEP 7: Calculate ATS score
     if jd_keywords:
@@ -224,7 +342,7 @@ def analyze_resume(resume_id: str, job_description: str) -> Dict:
         # Show top 5 missing keywords
         top_missing = missing[:5]
         recommendations.append(f"Consider adding these skills: {', '.join(top_missing)}")
-    if not resume_json.get("experience"):
+    if not has_experience:
         recommendations.append("Include relevant work or project experience")
 
     # ✅ STEP 9: Build and store report
@@ -238,16 +356,19 @@ def analyze_resume(resume_id: str, job_description: str) -> Dict:
         "created_at": datetime.utcnow()
     }
 
-    # Store in MongoDB
-    result = ats_collection.insert_one({
+    # Store in MongoDB off the request thread. The stored report is a
+    # snapshot because the returned one gains its string _id below.
+    report_id = ObjectId()
+    _ATS_WRITER.submit(_store_report, {
+        "_id": report_id,
         "resume_id": ObjectId(resume_id),
-        "report": report,
+        "report": dict(report),
         "created_at": report["created_at"]
     })
 
-    # JSON-safe return
-    report["_id"] = str(result.inserted_id)
-    report["created_at"] = report["created_at"].isoformat()
+    # JSON-safe return (created_at stays datetime: ISO 8601 via the API's
+    # JSON provider)
+    report["_id"] = str(report_id)
 
     logger.info(f"[ATS] Analysis complete: {report['_id']}")
 
@@ -8,8 +8,32 @@ MONGO_URI = os.environ.get("MONGO_URI")
 if not MONGO_URI:
     raise RuntimeError("MONGO_URI environment variable is required for MongoDB connection")
 
+# Connection pool and wire compression settings (overridable per deployment).
+# minPoolSize keeps warm connections open in the background, so the first
+# requests after startup don't pay the TCP/TLS handshake.
+MONGO_MAX_POOL_SIZE = int(os.environ.get("MONGO_MAX_POOL_SIZE", "50"))
+MONGO_MIN_POOL_SIZE = int(os.environ.get("MONGO_MIN_POOL_SIZE", "5"))
+# Idle connections above minPoolSize are closed after a minute; requests fail
+# fast when no server is reachable instead of hanging for PyMongo's 30s
+MONGO_MAX_IDLE_TIME_MS = int(os.environ.get("MONGO_MAX_IDLE_TIME_MS", "60000"))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(
+    os.environ.get("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000")
+)
+# Wire compression. zlib is stdlib; list zstd/snappy only where zstandard /
+# python-snappy are installed (PyMongo warns about each missing one)
+MONGO_COMPRESSORS = os.environ.get("MONGO_COMPRESSORS", "zlib")
+
 # Initialize a single global client and expose `db` for use across the app
-client = MongoClient(MONGO_URI)
+client = MongoClient(
+    MONGO_URI,
+    maxPoolSize=MONGO_MAX_POOL_SIZE,
+    minPoolSize=MONGO_MIN_POOL_SIZE,
+    maxIdleTimeMS=MONGO_MAX_IDLE_TIME_MS,
+    serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS,
+    compressors=MONGO_COMPRESSORS,
+    retryWrites=True,
+    retryReads=True
+)
 
 # Default database name (can be overridden in environment)
 DB_NAME = os.environ.get("RESUMEIQ_DB", "sentiq_resumeiq")
@@ -28,6 +52,18 @@ def init_db():
         # Create indexes for better query performance
         candidates_collection.create_index([("created_at", -1)])
         candidates_collection.create_index([("score", -1)])
+
+        # ResumeIQ collections
+        db["ats_reports"].create_index("resume_id")
+        # Latest portfolio per resume: equality + sort served by one index
+        db["portfolios"].create_index([("resume_id", 1), ("created_at", -1)])
+        db["profiles"].create_index([("created_at", -1)])
+        # Resumes per profile, newest first; also serves plain profile_id lookups
+        db["resumes"].create_index(
+            [("profile_id", 1), ("created_at", -1)],
+            name="profile_created_idx"
+        )
+        db["rendered_resumes"].create_index("resume_id")
     except Exception as e:
         print(f"Warning: Could not create indexes: {e}")
 
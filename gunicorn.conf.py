@@ -0,0 +1,28 @@
+"""
+gunicorn.conf.py
+----------------
+Production WSGI server settings for the ResumeIQ API.
+
+Usage:
+    gunicorn -c gunicorn.conf.py app:app
+"""
+
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+
+# Threaded workers: handlers mostly wait on MongoDB and LLM APIs, so
+# threads give request concurrency without a process per request
+worker_class = "gthread"
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+threads = int(os.environ.get("GUNICORN_THREADS", "4"))
+
+# LLM calls and PDF rendering regularly exceed the 30s default
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "120"))
+keepalive = 5
+
+# NOT preloaded: db.py opens a MongoClient at import and PyMongo clients
+# are not fork-safe. Each worker imports the app itself and builds its own
+# client, caches and lookup tables.
+preload_app = False
@@ -18,11 +18,14 @@ Design goals:
 
 import os
 import time
-import shelve
+import asyncio
+import queue
+import sqlite3
 import hashlib
 import threading
 import logging
 import importlib
+from collections import OrderedDict
 from typing import Optional
 
 # ------------------------------
@@ -57,7 +60,9 @@ GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
 GROQ_API_KEY = os.getenv("GROQ_API_KEY", "")
 GROQ_MODEL = os.getenv("GROQ_MODEL", "llama-3.1-8b-instant")
 
-CACHE_FILE = os.getenv("SENTIQ_CACHE_FILE", "sentiq_cache.db")
+CACHE_FILE = os.getenv("SENTIQ_CACHE_FILE", "sentiq_cache.sqlite3")
+CACHE_MAX_ENTRIES = int(os.getenv("SENTIQ_CACHE_MAX_ENTRIES", "2048"))
+CACHE_TTL = int(os.getenv("SENTIQ_CACHE_TTL", str(30 * 86400)))  # seconds
 RPM = int(os.getenv("SENTIQ_RPM", "120"))
 
 # ------------------------------
@@ -73,17 +78,20 @@ logger.setLevel(logging.INFO)
 # ------------------------------
 # Rate Limiter
 # ------------------------------
+# The critical section is a few float ops, so the lock is held for well under
+# a microsecond; callers wait on provider HTTP, not here. A monotonic clock
+# keeps wall-clock adjustments (NTP steps) from draining or overfilling it.
 class TokenBucket:
     def __init__(self, rpm):
         self.capacity = rpm
         self.tokens = rpm
         self.rate = rpm / 60.0
-        self.last = time.time()
+        self.last = time.monotonic()
         self.lock = threading.Lock()
 
     def consume(self, n=1):
         with self.lock:
-            now = time.time()
+            now = time.monotonic()
             delta = now - self.last
             self.last = now
             self.tokens = min(self.capacity, self.tokens + delta * self.rate)
@@ -98,13 +106,119 @@ bucket = TokenBucket(RPM)
 # Cache helpers
 # ------------------------------
 def _cache_key(prompt: str, task: str, model: str):
-    h = hashlib.sha256()
-    h.update(f"{task}|{model}|{prompt}".encode())
-    return h.hexdigest()
+    # Hash the small prefix and the prompt separately so the (possibly tens
+    # of KB) prompt is never copied into a combined string first. SHA-256 is
+    # hardware accelerated (SHA-NI) on our hosts; 128 bits is plenty for keys.
+    h = hashlib.sha256(f"{task}|{model}|".encode())
+    h.update(prompt.encode())
+    return h.hexdigest()[:32]
+
+# L1: in-process LRU. L2: SQLite (WAL) shared by all workers on the host,
+# written behind by a background thread so provider responses are never
+# held up by disk I/O. Both tiers store (value, created_at); entries older
+# than CACHE_TTL are misses, and expired rows are pruned at startup.
+_CACHE: "OrderedDict[str, tuple]" = OrderedDict()
+_CACHE_LOCK = threading.RLock()
+_CACHE_WRITES: "queue.Queue" = queue.Queue()
+_CACHE_DB_LOCK = threading.Lock()
+
+
+def _open_cache_db() -> Optional[sqlite3.Connection]:
+    try:
+        conn = sqlite3.connect(CACHE_FILE, timeout=5, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        conn.execute(
+            "DELETE FROM llm_cache WHERE created_at < ?", (time.time() - CACHE_TTL,)
+        )
+        conn.commit()
+        return conn
+    except Exception as e:
+        logger.warning("LLM cache store unavailable (%s): %s", CACHE_FILE, e)
+        return None
+
+
+_cache_db = _open_cache_db()
+
+
+def _cache_remember(key: str, value: str, created_at: float):
+    with _CACHE_LOCK:
+        _CACHE[key] = (value, created_at)
+        _CACHE.move_to_end(key)
+        while len(_CACHE) > CACHE_MAX_ENTRIES:
+            _CACHE.popitem(last=False)
+
+
+def _cache_get(key: str) -> Optional[str]:
+    cutoff = time.time() - CACHE_TTL
+
+    with _CACHE_LOCK:
+        entry = _CACHE.get(key)
+        if entry is not None:
+            if entry[1] >= cutoff:
+                _CACHE.move_to_end(key)
+                return entry[0]
+            del _CACHE[key]
+
+    if _cache_db is None:
+        return None
+
+    try:
+        with _CACHE_DB_LOCK:
+            row = _cache_db.execute(
+                "SELECT value, created_at FROM llm_cache "
+                "WHERE key = ? AND created_at >= ?",
+                (key, cutoff)
+            ).fetchone()
+    except Exception:
+        return None
+
+    if row is None:
+        return None
+    _cache_remember(key, row[0], row[1])
+    return row[0]
+
+
+def _cache_set(key: str, value: str):
+    now = time.time()
+    _cache_remember(key, value, now)
+    if _cache_db is not None:
+        _CACHE_WRITES.put((key, value, now))
+
+
+def _cache_writer():
+    while True:
+        batch = [_CACHE_WRITES.get()]
+        while True:
+            try:
+                batch.append(_CACHE_WRITES.get_nowait())
+            except queue.Empty:
+                break
+        try:
+            with _CACHE_DB_LOCK, _cache_db:
+                _cache_db.executemany(
+                    "INSERT OR REPLACE INTO llm_cache (key, value, created_at) "
+                    "VALUES (?, ?, ?)",
+                    batch
+                )
+        except Exception as e:
+            logger.warning("LLM cache write failed: %s", e)
+
+
+if _cache_db is not None:
+    threading.Thread(target=_cache_writer, name="sentiq-cache-writer", daemon=True).start()
 
 # ------------------------------
 # Task policies
 # ------------------------------
+# Sent as Gemini's system_instruction for STRICT_JSON_TASKS (Groq always
+# runs in JSON mode with its own system message)
+STRICT_JSON_INSTRUCTION = "Respond ONLY with valid JSON. No markdown. No explanations."
+
 STRICT_JSON_TASKS = {
     "recruiter_eval",
     "profile_structuring",
@@ -123,10 +237,38 @@ def simulated_response(prompt: str, task: str) -> str:
         return '{"status":"simulated","task":"' + task + '"}'
     return "SIMULATED RESPONSE"
 
+# ------------------------------
+# SDK clients (created once, reused across calls)
+# ------------------------------
+if GENAI_MODULE and GEMINI_API_KEY and hasattr(GENAI_MODULE, "configure"):
+    GENAI_MODULE.configure(api_key=GEMINI_API_KEY)
+
+_gemini_models = {}
+_gemini_models_lock = threading.Lock()
+
+_groq_client = groq.Groq(api_key=GROQ_API_KEY) if groq and GROQ_API_KEY else None
+
+
+def _gemini_model(name: str, strict_json: bool = False):
+    cache_key = (name, strict_json)
+    model_obj = _gemini_models.get(cache_key)
+    if model_obj is None:
+        with _gemini_models_lock:
+            model_obj = _gemini_models.get(cache_key)
+            if model_obj is None:
+                if strict_json:
+                    model_obj = GENAI_MODULE.GenerativeModel(
+                        name, system_instruction=STRICT_JSON_INSTRUCTION
+                    )
+                else:
+                    model_obj = GENAI_MODULE.GenerativeModel(name)
+                _gemini_models[cache_key] = model_obj
+    return model_obj
+
 # ------------------------------
 # Gemini invocation
 # ------------------------------
-def _call_gemini(prompt: str, model: Optional[str] = None) -> str:
+def _call_gemini(prompt: str, model: Optional[str] = None, strict_json: bool = False) -> str:
     if not GENAI_MODULE:
         raise RuntimeError("Gemini SDK not installed")
     if not GEMINI_API_KEY:
@@ -135,25 +277,27 @@ def _call_gemini(prompt: str, model: Optional[str] = None) -> str:
     if not bucket.consume():
         raise RuntimeError("Rate limit exceeded")
 
-    if hasattr(GENAI_MODULE, "configure"):
-        GENAI_MODULE.configure(api_key=GEMINI_API_KEY)
-
-    model_obj = GENAI_MODULE.GenerativeModel(model or GEMINI_MODEL)
+    model_obj = _gemini_model(model or GEMINI_MODEL, strict_json)
     resp = model_obj.generate_content(prompt)
     return getattr(resp, "text", str(resp))
 
 # ------------------------------
 # Groq invocation (JSON-safe)
 # ------------------------------
-def _call_groq(prompt: str, model: Optional[str] = None) -> str:
-    if not groq or not GROQ_API_KEY:
+def _call_groq(prompt: str, model: Optional[str] = None, strict_json: bool = False) -> str:
+    # strict_json is implied: Groq always runs in JSON mode
+    if _groq_client is None:
         raise RuntimeError("Groq not configured")
 
     if not bucket.consume():
         raise RuntimeError("Rate limit exceeded")
 
-    client = groq.Groq(api_key=GROQ_API_KEY)
-    completion = client.chat.completions.create(
+    completion = _groq_client.chat.completions.create(**_groq_request(prompt, model))
+    return completion.choices[0].message.content.strip()
+
+
+def _groq_request(prompt: str, model: Optional[str] = None) -> dict:
+    return dict(
         model=model or GROQ_MODEL,
         messages=[
             {"role": "system", "content": "You must respond with valid JSON only."},
@@ -162,11 +306,89 @@ def _call_groq(prompt: str, model: Optional[str] = None) -> str:
         temperature=0.3,
         response_format={"type": "json_object"}
     )
+
+# ------------------------------
+# Async invocation (native async SDK clients)
+# ------------------------------
+async def _acall_gemini(prompt: str, model: Optional[str] = None, strict_json: bool = False) -> str:
+    if not GENAI_MODULE:
+        raise RuntimeError("Gemini SDK not installed")
+    if not GEMINI_API_KEY:
+        raise RuntimeError("GEMINI_API_KEY missing")
+
+    if not bucket.consume():
+        raise RuntimeError("Rate limit exceeded")
+
+    model_obj = _gemini_model(model or GEMINI_MODEL, strict_json)
+    resp = await model_obj.generate_content_async(prompt)
+    return getattr(resp, "text", str(resp))
+
+
+async def _acall_groq(prompt: str, model: Optional[str] = None, strict_json: bool = False) -> str:
+    if not groq or not GROQ_API_KEY:
+        raise RuntimeError("Groq not configured")
+
+    if not bucket.consume():
+        raise RuntimeError("Rate limit exceeded")
+
+    # Not cached: the async client's connection pool is bound to the event
+    # loop it was first used on. Closed on exit so its sockets don't leak.
+    async with groq.AsyncGroq(api_key=GROQ_API_KEY) as client:
+        completion = await client.chat.completions.create(**_groq_request(prompt, model))
     return completion.choices[0].message.content.strip()
 
+
+_ASYNC_PROVIDERS = {"gemini": _acall_gemini, "groq": _acall_groq}
+
+# ------------------------------
+# Circuit breaker
+# ------------------------------
+# After BREAKER_FAILURES consecutive failures a provider is skipped for
+# BREAKER_COOLDOWN seconds, so an outage costs one timeout per cooldown
+# instead of one per request.
+BREAKER_FAILURES = 3
+BREAKER_COOLDOWN = 30.0
+
+_breaker = {p: {"failures": 0, "open_until": 0.0} for p in ("gemini", "groq")}
+_breaker_lock = threading.Lock()
+
+
+def _available(providers):
+    """Providers whose breaker is closed; all of them if every one is open."""
+    now = time.monotonic()
+    closed = [p for p in providers if _breaker[p]["open_until"] <= now]
+    return closed or providers
+
+
+def _record_success(p: str):
+    with _breaker_lock:
+        _breaker[p]["failures"] = 0
+        _breaker[p]["open_until"] = 0.0
+
+
+def _record_failure(p: str):
+    with _breaker_lock:
+        state = _breaker[p]
+        state["failures"] += 1
+        if state["failures"] >= BREAKER_FAILURES:
+            state["open_until"] = time.monotonic() + BREAKER_COOLDOWN
+            logger.warning(
+                "Provider %s open for %.0fs after %d failures",
+                p, BREAKER_COOLDOWN, state["failures"]
+            )
+
 # ------------------------------
 # Router
 # ------------------------------
+def _route(prompt: str, task: str, prefer: Optional[str], model_override: Optional[str]):
+    """Return (cache_key, provider_order) for a router call."""
+    model = model_override or (GEMINI_MODEL if prefer != "groq" else GROQ_MODEL)
+    key = _cache_key(prompt, task, model)
+
+    providers = ["gemini", "groq"] if prefer != "groq" else ["groq", "gemini"]
+    return key, _available(providers)
+
+
 def call_llm_router(
     prompt: str,
     task: str = "general",
@@ -178,45 +400,133 @@ def call_llm_router(
     if use_simulation:
         return simulated_response(prompt, task)
 
-    model = model_override or (GEMINI_MODEL if prefer != "groq" else GROQ_MODEL)
-    key = _cache_key(prompt, task, model)
+    key, providers = _route(prompt, task, prefer, model_override)
 
-    # Cache
-    try:
-        with shelve.open(CACHE_FILE) as db:
-            if key in db:
-                return db[key]
-    except Exception:
-        pass
+    # Enforce JSON if needed (system instruction, not a prompt prefix)
+    strict_json = task in STRICT_JSON_TASKS
 
-    # Enforce JSON if needed
-    if task in STRICT_JSON_TASKS:
-        prompt = (
-            "SYSTEM: Respond ONLY with valid JSON. "
-            "No markdown. No explanations.\n\n" + prompt
-        )
+    # Cache
+    cached = _cache_get(key)
+    if cached is not None:
+        return cached
 
-    providers = ["gemini", "groq"] if prefer != "groq" else ["groq", "gemini"]
     last_error = None
 
     for p in providers:
         try:
             if p == "gemini":
-                result = _call_gemini(prompt, model_override)
+                result = _call_gemini(prompt, model_override, strict_json)
             else:
-                result = _call_groq(prompt, model_override)
+                result = _call_groq(prompt, model_override, strict_json)
 
-            with shelve.open(CACHE_FILE) as db:
-                db[key] = result
+            _record_success(p)
+            _cache_set(key, result)
             return result
 
         except Exception as e:
             last_error = e
+            _record_failure(p)
             logger.warning("Provider %s failed: %s", p, e)
 
     logger.error("All providers failed: %s", last_error)
     return "SYSTEM OVERLOAD"
 
+
+async def acall_llm_router(
+    prompt: str,
+    task: str = "general",
+    use_simulation: bool = False,
+    prefer: Optional[str] = None,
+    model_override: Optional[str] = None
+) -> str:
+    """
+    Async router over the providers' native async clients.
+
+    Falls back in order like call_llm_router, without blocking the event
+    loop. prefer="race" starts every provider at once, returns the first
+    successful answer and cancels the rest.
+    """
+
+    if use_simulation:
+        return simulated_response(prompt, task)
+
+    key, providers = _route(prompt, task, prefer, model_override)
+
+    # Enforce JSON if needed (system instruction, not a prompt prefix)
+    strict_json = task in STRICT_JSON_TASKS
+
+    # Cache
+    cached = _cache_get(key)
+    if cached is not None:
+        return cached
+
+    if prefer == "race":
+        result = await _race_providers(prompt, providers, model_override, strict_json)
+        if result is not None:
+            _cache_set(key, result)
+            return result
+        return "SYSTEM OVERLOAD"
+
+    last_error = None
+
+    for p in providers:
+        try:
+            result = await _ASYNC_PROVIDERS[p](prompt, model_override, strict_json)
+
+            _record_success(p)
+            _cache_set(key, result)
+            return result
+
+        except Exception as e:
+            last_error = e
+            _record_failure(p)
+            logger.warning("Provider %s failed: %s", p, e)
+
+    logger.error("All providers failed: %s", last_error)
+    return "SYSTEM OVERLOAD"
+
+
+async def _race_providers(
+    prompt: str,
+    providers,
+    model_override: Optional[str],
+    strict_json: bool
+) -> Optional[str]:
+    pending = {
+        asyncio.ensure_future(_ASYNC_PROVIDERS[p](prompt, model_override, strict_json)): p
+        for p in providers
+    }
+    last_error = None
+
+    winner = None
+
+    try:
+        while pending and winner is None:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            # Settle every finished task (not just the first success), so each
+            # failure reaches the circuit breaker and no exception goes unread
+            for task in done:
+                p = pending.pop(task)
+                try:
+                    result = task.result()
+                except Exception as e:
+                    last_error = e
+                    _record_failure(p)
+                    logger.warning("Provider %s failed: %s", p, e)
+                else:
+                    _record_success(p)
+                    if winner is None:
+                        winner = result
+    finally:
+        for task in pending:
+            task.cancel()
+        # Wait for the cancellations to finish before returning
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    if winner is None:
+        logger.error("All providers failed: %s", last_error)
+    return winner
+
 # ------------------------------
 # Backward-compatible API
 # ------------------------------
@@ -0,0 +1,31 @@
+"""
+pdf_worker.py
+-------------
+ResumeIQ — WeasyPrint rendering in long-lived worker processes
+
+Responsibility:
+- Render HTML to PDF bytes inside a ProcessPoolExecutor worker
+- Keep WeasyPrint and its font configuration loaded between renders
+
+Deliberately imports nothing from the app (no DB, no dotenv), so spawned
+workers start quickly. Under gunicorn (app:app) they open no MongoDB
+connections; under `python app.py`, spawn re-imports app.py as __mp_main__
+and runs its startup in each worker (development only).
+"""
+
+_font_config = None
+
+
+def init_worker():
+    """Pool initializer: import WeasyPrint and build fonts once per worker."""
+    global _font_config
+    from weasyprint.text.fonts import FontConfiguration
+
+    _font_config = FontConfiguration()
+
+
+def render_pdf(html: str) -> bytes:
+    """Render an HTML string to PDF bytes."""
+    from weasyprint import HTML
+
+    return HTML(string=html).write_pdf(font_config=_font_config)
@@ -19,8 +19,10 @@ NO parsing
 NO PDF rendering
 """
 
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import Dict, Any
+import io
 import os
 
 from bson import ObjectId
@@ -39,125 +41,89 @@ from db import db
 
 portfolios_collection = db["portfolios"]
 
+# Profile lookups overlap the resume lookup on the request thread
+_FETCH_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="portfolio-fetch")
+
 # ------------------------------
 # HTML Template
 # ------------------------------
 
-def generate_portfolio_html(
-    resume: Dict[str, Any],
-    profile: Dict[str, Any]
-) -> str:
-    """
-    Generate a clean, responsive portfolio HTML page.
-    
-    PRIMARY DATA SOURCE: resume["resume"] (canonical schema)
-    FALLBACK: profile["structured"]
-    """
-
-    # Extract from resume (primary source)
-    resume_data = resume.get("resume", {})
-    
-    # Personal info
-    personal = resume_data.get("personal", {})
-    name = personal.get("name") or profile["structured"].get("personal", {}).get("name", "Portfolio")
-    email = personal.get("email", "")
-    phone = personal.get("phone", "")
-    location = personal.get("location", "")
-    
-    # Summary
-    summary = resume_data.get("summary", "")
-    
-    # Skills
-    skills = resume_data.get("skills", [])
-    if not skills:
-        skills = profile["structured"].get("skills", [])
-    
-    # Projects
-    projects = resume_data.get("projects", [])
-    if not projects:
-        projects = profile["structured"].get("projects", [])
-    
-    # Experience
-    experience = resume_data.get("experience", [])
-    if not experience:
-        experience = profile["structured"].get("experience", [])
-    
-    # Education
-    education = resume_data.get("education", [])
-    if not education:
-        education = profile["structured"].get("education", [])
-    
-    # Links
-    links = resume_data.get("links", {})
-    if not links:
-        links = profile["structured"].get("links", {})
-
-    html = f"""
-<!DOCTYPE html>
-<html lang="en">
-<head>
-<meta charset="UTF-8">
-<meta name="viewport" content="width=device-width, initial-scale=1.0">
-<title>{name} | Portfolio</title>
-<style>
-* {{ margin: 0; padding: 0; box-sizing: border-box; }}
-body {{
+# Repeated fragments, formatted once per item
+_SKILL_CATEGORY_TMPL = "<div class='skill-category'><strong>{category}:</strong> {items}</div>"
+_SKILL_TMPL = '<span class="skill">{}</span>'
+_PROJECT_CARD_TMPL = (
+    "<div class='card'><h3>{title}</h3><p>{description}</p>"
+    "<p><em>Technologies:</em> {technologies}</p></div>"
+)
+_EXPERIENCE_CARD_TMPL = (
+    "<div class='card'><h3>{role}</h3>"
+    "<p><strong>{organization}</strong> | {duration}</p><p>{details}</p></div>"
+)
+_EDUCATION_CARD_TMPL = (
+    "<div class='card'><h3>{degree}</h3>"
+    "<p><strong>{institution}</strong> | {year}</p></div>"
+)
+
+# Static stylesheet, identical for every portfolio
+_PORTFOLIO_CSS = """<style>
+* { margin: 0; padding: 0; box-sizing: border-box; }
+body {
   font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, Arial, sans-serif;
   margin: 0;
   padding: 0;
   line-height: 1.6;
   background: #ffffff;
   color: #1a1a1a;
-}}
-header {{
+}
+header {
   padding: 64px 24px;
   background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
   color: #fff;
   text-align: center;
-}}
-header h1 {{
+}
+header h1 {
   font-size: 2.5rem;
   font-weight: 700;
   margin-bottom: 8px;
-}}
-header p {{
+}
+header p {
   font-size: 1.1rem;
   opacity: 0.95;
   margin: 4px 0;
-}}
-.contact-links {{
+}
+.contact-links {
   margin-top: 16px;
   font-size: 0.95rem;
-}}
-.contact-links a {{
+}
+.contact-links a {
   color: #fff;
   text-decoration: underline;
   margin: 0 12px;
-}}
-section {{
+}
+section {
   padding: 48px 24px;
   max-width: 1000px;
   margin: auto;
-}}
-h2 {{
+}
+h2 {
   font-size: 1.8rem;
   margin-bottom: 24px;
   color: #333;
   border-bottom: 3px solid #667eea;
   padding-bottom: 8px;
   display: inline-block;
-}}
-.skills-grid {{
+}
+.skills-grid {
   margin-top: 16px;
-}}
-.skill-category {{
+}
+.skill-category {
   margin-bottom: 16px;
-}}
-.skill-category strong {{
+}
+.skill-category strong {
   color: #555;
   font-size: 1rem;
-}}
-.skill {{
+}
+.skill {
   display: inline-block;
   margin: 6px 8px 6px 0;
   padding: 8px 16px;
@@ -166,105 +132,191 @@ h2 {{
   font-size: 0.9rem;
   color: #333;
   border: 1px solid #ddd;
-}}
-.card {{
+}
+.card {
   margin-bottom: 32px;
   padding: 20px;
   background: #fafafa;
   border-left: 4px solid #667eea;
   border-radius: 4px;
-}}
-.card h3 {{
+}
+.card h3 {
   font-size: 1.3rem;
   color: #333;
   margin-bottom: 8px;
-}}
-.card p {{
+}
+.card p {
   margin: 8px 0;
   color: #555;
-}}
-.card em {{
+}
+.card em {
   color: #666;
   font-size: 0.9rem;
-}}
-.footer {{
+}
+.footer {
   padding: 32px 24px;
   text-align: center;
   font-size: 0.9rem;
   color: #888;
   background: #f9f9f9;
   margin-top: 48px;
-}}
-@media (max-width: 768px) {{
-  header h1 {{ font-size: 2rem; }}
-  h2 {{ font-size: 1.5rem; }}
-}}
+}
+@media (max-width: 768px) {
+  header h1 { font-size: 2rem; }
+  h2 { font-size: 1.5rem; }
+}
 </style>
-</head>
+"""
+
+
+def generate_portfolio_html(
+    resume: Dict[str, Any],
+    profile: Dict[str, Any]
+) -> str:
+    """
+    Generate a clean, responsive portfolio HTML page.
+    
+    PRIMARY DATA SOURCE: resume["resume"] (canonical schema)
+    FALLBACK: profile["structured"]
+    """
+
+    # Extract from resume (primary source)
+    resume_data = resume.get("resume", {})
+    
+    # Personal info
+    personal = resume_data.get("personal", {})
+    name = personal.get("name") or profile["structured"].get("personal", {}).get("name", "Portfolio")
+    email = personal.get("email", "")
+    phone = personal.get("phone", "")
+    location = personal.get("location", "")
+    
+    # Summary
+    summary = resume_data.get("summary", "")
+    
+    # Skills
+    skills = resume_data.get("skills", [])
+    if not skills:
+        skills = profile["structured"].get("skills", [])
+    
+    # Projects
+    projects = resume_data.get("projects", [])
+    if not projects:
+        projects = profile["structured"].get("projects", [])
+    
+    # Experience
+    experience = resume_data.get("experience", [])
+    if not experience:
+        experience = profile["structured"].get("experience", [])
+    
+    # Education
+    education = resume_data.get("education", [])
+    if not education:
+        education = profile["structured"].get("education", [])
+    
+    # Links
+    links = resume_data.get("links", {})
+    if not links:
+        links = profile["structured"].get("links", {})
+
+    buf = io.StringIO()
+    w = buf.write
+
+    w(f"""
+<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="UTF-8">
+<meta name="viewport" content="width=device-width, initial-scale=1.0">
+<title>{name} | Portfolio</title>
+""")
+    w(_PORTFOLIO_CSS)
+    w(f"""</head>
 <body>
 
 <header>
   <h1>{name}</h1>
-  {f"<p>{email}</p>" if email else ""}
-  {f"<p>{phone} • {location}</p>" if phone or location else f"<p>{location}</p>" if location else ""}
-  <div class="contact-links">
-    {f'<a href="{links.get("github")}" target="_blank">GitHub</a>' if links.get("github") else ""}
-    {f'<a href="{links.get("linkedin")}" target="_blank">LinkedIn</a>' if links.get("linkedin") else ""}
-    {f'<a href="{links.get("portfolio")}" target="_blank">Website</a>' if links.get("portfolio") else ""}
-  </div>
-</header>
-
-{f'''<section>
-  <h2>About Me</h2>
-  <p style="font-size: 1.05rem; line-height: 1.7; color: #444;">{summary}</p>
-</section>''' if summary else ""}
-
-<section>
-  <h2>Skills</h2>
-  <div class="skills-grid">
-  {"".join(
-      f"<div class='skill-category'><strong>{s.get('category', 'Skills')}:</strong> "
-      + " ".join(f'<span class="skill">{item}</span>' for item in s.get('items', []))
-      + "</div>"
-      for s in skills
-  ) if skills else "<p>No skills listed.</p>"}
-  </div>
-</section>
-
-{f'''<section>
-  <h2>Projects</h2>
-  {"".join(
-      f"<div class='card'>"
-      f"<h3>{p.get('title', 'Untitled Project')}</h3>"
-      f"<p>{p.get('description', '')}</p>"
-      f"<p><em>Technologies:</em> {', '.join(p.get('technologies', []))}</p>"
-      f"</div>"
-      for p in projects
-  )}
-</section>''' if projects else ""}
-
-{f'''<section>
-  <h2>Experience</h2>
-  {"".join(
-      f"<div class='card'>"
-      f"<h3>{e.get('role', 'Role')}</h3>"
-      f"<p><strong>{e.get('organization', 'Company')}</strong> | {e.get('duration', '')}</p>"
-      f"<p>{e.get('details', '')}</p>"
-      f"</div>"
-      for e in experience
-  )}
-</section>''' if experience else ""}
-
-{f'''<section>
-  <h2>Education</h2>
-  {"".join(
-      f"<div class='card'>"
-      f"<h3>{ed.get('degree', 'Degree')}</h3>"
-      f"<p><strong>{ed.get('institution', 'Institution')}</strong> | {ed.get('year', '')}</p>"
-      f"</div>"
-      for ed in education
-  )}
-</section>''' if education else ""}
+  """)
+
+    # Header contact lines and links
+    if email:
+        w(f"<p>{email}</p>")
+    w("\n  ")
+    if phone or location:
+        w(f"<p>{phone} • {location}</p>")
+    w('\n  <div class="contact-links">\n    ')
+    if links.get("github"):
+        w(f'<a href="{links.get("github")}" target="_blank">GitHub</a>')
+    w("\n    ")
+    if links.get("linkedin"):
+        w(f'<a href="{links.get("linkedin")}" target="_blank">LinkedIn</a>')
+    w("\n    ")
+    if links.get("portfolio"):
+        w(f'<a href="{links.get("portfolio")}" target="_blank">Website</a>')
+    w("\n  </div>\n</header>\n\n")
+
+    # About
+    if summary:
+        w("<section>\n  <h2>About Me</h2>\n")
+        w(f'  <p style="font-size: 1.05rem; line-height: 1.7; color: #444;">{summary}</p>\n')
+        w("</section>")
+    w('\n\n<section>\n  <h2>Skills</h2>\n  <div class="skills-grid">\n  ')
+
+    # Skills
+    if skills:
+        w("".join([
+            _SKILL_CATEGORY_TMPL.format(
+                category=s.get('category', 'Skills'),
+                items=" ".join([_SKILL_TMPL.format(item) for item in s.get('items', [])])
+            )
+            for s in skills
+        ]))
+    else:
+        w("<p>No skills listed.</p>")
+    w("\n  </div>\n</section>\n\n")
+
+    # Projects
+    if projects:
+        w("<section>\n  <h2>Projects</h2>\n  ")
+        w("".join([
+            _PROJECT_CARD_TMPL.format(
+                title=p.get('title', 'Untitled Project'),
+                description=p.get('description', ''),
+                technologies=', '.join(p.get('technologies', []))
+            )
+            for p in projects
+        ]))
+        w("\n</section>")
+    w("\n\n")
+
+    # Experience
+    if experience:
+        w("<section>\n  <h2>Experience</h2>\n  ")
+        w("".join([
+            _EXPERIENCE_CARD_TMPL.format(
+                role=e.get('role', 'Role'),
+                organization=e.get('organization', 'Company'),
+                duration=e.get('duration', ''),
+                details=e.get('details', '')
+            )
+            for e in experience
+        ]))
+        w("\n</section>")
+    w("\n\n")
+
+    # Education
+    if education:
+        w("<section>\n  <h2>Education</h2>\n  ")
+        w("".join([
+            _EDUCATION_CARD_TMPL.format(
+                degree=ed.get('degree', 'Degree'),
+                institution=ed.get('institution', 'Institution'),
+                year=ed.get('year', '')
+            )
+            for ed in education
+        ]))
+        w("\n</section>")
+
+    w("""
 
 <div class="footer">
   Generated by ResumeIQ • SentIQ AI Labs
@@ -272,7 +324,9 @@ h2 {{
 
 </body>
 </html>
-"""
+""")
+
+    html = buf.getvalue()
     
     # CRITICAL: Fail if HTML is suspiciously short (< 500 chars)
     if len(html) < 500:
@@ -309,13 +363,19 @@ def generate_portfolio(
     if not resume_id:
         raise ValueError("resume_id is required for portfolio generation")
 
+    # Fetch resume and profile concurrently (two independent round-trips)
+    # Only the canonical resume and structured profile feed the HTML
+    profile_future = _FETCH_POOL.submit(
+        get_profile_by_id, profile_id, {"structured": 1}
+    )
+
     # Validate resume exists
-    resume = get_resume_by_id(resume_id)
+    resume = get_resume_by_id(resume_id, projection={"resume": 1})
     if not resume:
         raise ValueError(f"Resume not found: {resume_id}")
 
     # Validate profile exists
-    profile = get_profile_by_id(profile_id)
+    profile = profile_future.result()
     if not profile:
         raise ValueError(f"Profile not found: {profile_id}")
 
@@ -334,9 +394,6 @@ def generate_portfolio(
     portfolio_doc["_id"] = str(result.inserted_id)
     portfolio_doc["profile_id"] = profile_id
     portfolio_doc["resume_id"] = resume_id
-    
-    # Convert datetime to ISO string for JSON serialization
-    portfolio_doc["created_at"] = portfolio_doc["created_at"].isoformat()
 
     return portfolio_doc
 
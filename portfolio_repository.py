@@ -13,30 +13,28 @@ from bson import ObjectId
 from datetime import datetime
 
 from db import db
+from validators import is_object_id
 
 portfolios_collection = db["portfolios"]
 
 
 def _serialize_portfolio(doc: Dict[str, Any]) -> Optional[Dict[str, Any]]:
     """
-    Convert MongoDB document to JSON-safe dict.
+    Convert MongoDB document to JSON-safe dict (in place: PyMongo returns
+    a fresh dict per document, so no copy is needed).
     """
     if not doc:
         return None
 
-    doc = dict(doc)
     doc["_id"] = str(doc["_id"])
-    
-    if "profile_id" in doc and isinstance(doc["profile_id"], ObjectId):
+
+    if isinstance(doc.get("profile_id"), ObjectId):
         doc["profile_id"] = str(doc["profile_id"])
-    
-    if "resume_id" in doc and isinstance(doc["resume_id"], ObjectId):
+
+    if isinstance(doc.get("resume_id"), ObjectId):
         doc["resume_id"] = str(doc["resume_id"])
-    
-    # Convert datetime objects to ISO format strings
-    if "created_at" in doc and hasattr(doc["created_at"], "isoformat"):
-        doc["created_at"] = doc["created_at"].isoformat()
-    
+
+    # created_at stays datetime (ISO 8601 via the API's JSON provider)
     return doc
 
 
@@ -50,6 +48,8 @@ def get_portfolio_by_id(portfolio_id: str) -> Optional[Dict[str, Any]]:
     Returns:
         dict | None
     """
+    if not is_object_id(portfolio_id):
+        return None
     try:
         doc = portfolios_collection.find_one({"_id": ObjectId(portfolio_id)})
         return _serialize_portfolio(doc)
@@ -67,6 +67,8 @@ def get_portfolio_by_resume_id(resume_id: str) -> Optional[Dict[str, Any]]:
     Returns:
         dict | None
     """
+    if not is_object_id(resume_id):
+        return None
     try:
         doc = portfolios_collection.find_one(
             {"resume_id": ObjectId(resume_id)},
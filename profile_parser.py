@@ -14,14 +14,24 @@ NO database logic
 NO recruiter assumptions
 """
 
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import BinaryIO, Iterable
 import io
+import os
 import re
 
 import pdfplumber
 import pytesseract
 from PIL import Image
 
+# Optional: PDFium-backed text extraction (much faster than pdfminer)
+try:
+    import pypdfium2 as pdfium
+except Exception:
+    pdfium = None
+
 
 # ------------------------------
 # Public API
@@ -30,15 +40,19 @@ from PIL import Image
 def parse_profile_input(
     file_bytes: bytes | None = None,
     filename: str | None = None,
-    manual_text: str | None = None
+    manual_text: str | None = None,
+    file_stream: BinaryIO | None = None
 ) -> str:
     """
     Unified entry point.
 
     Accepts:
-    - Uploaded PDF/TXT (bytes + filename)
+    - Uploaded PDF/TXT (bytes or seekable binary stream + filename)
     - OR manually entered text
 
+    Prefer file_stream for uploads: the PDF is read straight from the
+    (spooled) upload instead of being copied into memory first.
+
     Returns:
     - Cleaned, normalized profile text (string)
 
@@ -51,15 +65,18 @@ def parse_profile_input(
         _validate_text(text)
         return text
 
-    if not file_bytes or not filename:
+    if file_stream is None and file_bytes:
+        file_stream = io.BytesIO(file_bytes)
+
+    if file_stream is None or not filename:
         raise ValueError("No input provided")
 
     suffix = Path(filename).suffix.lower()
 
     if suffix == ".pdf":
-        text = _extract_text_from_pdf(file_bytes)
+        text = _extract_text_from_pdf(file_stream)
     elif suffix == ".txt":
-        text = _extract_text_from_txt(file_bytes)
+        text = _extract_text_from_txt(file_stream.read())
     else:
         raise ValueError("Unsupported file type. Only PDF or TXT allowed.")
 
@@ -83,29 +100,111 @@ def _extract_text_from_txt(file_bytes: bytes) -> str:
 # PDF extraction (text + OCR fallback)
 # ------------------------------
 
-def _extract_text_from_pdf(file_bytes: bytes) -> str:
-    text = ""
+# Rasterization DPI for scanned pages; tesseract accuracy drops below ~300
+OCR_RESOLUTION = 300
+
+# tesseract processes per web worker, shared by all requests (each gunicorn
+# worker runs several request threads). Each process is limited to one
+# OpenMP thread, so concurrency is bounded by OCR_WORKERS alone.
+OCR_WORKERS = int(os.environ.get("OCR_WORKERS", "2"))
+os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+_OCR_POOL = ThreadPoolExecutor(max_workers=OCR_WORKERS, thread_name_prefix="ocr")
+
 
-    # 1️⃣ Try text-based extraction
+def _extract_text_from_pdf(pdf_stream: BinaryIO) -> str:
+    # Each backend parses the PDF once and uses that handle for both the
+    # text pass and, for scanned PDFs, rendering pages for OCR
+    if pdfium is not None:
+        try:
+            return _extract_with_pdfium(pdf_stream)
+        except Exception:
+            pass
+    return _extract_with_pdfplumber(pdf_stream)
+
+
+def _extract_with_pdfium(pdf_stream: BinaryIO) -> str:
+    pdf_stream.seek(0)
+    pdf = pdfium.PdfDocument(pdf_stream)
     try:
-        with pdfplumber.open(io.BytesIO(file_bytes)) as pdf:
-            for page in pdf.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text += page_text + "\n"
-    except Exception:
+        # 1️⃣ Try text-based extraction
         text = ""
+        for page in pdf:
+            page_text = page.get_textpage().get_text_range()
+            if page_text:
+                text += page_text + "\n"
+
+        if text.strip():
+            return text
+
+        # 2️⃣ OCR fallback (scanned PDFs). Pages are rendered lazily as
+        # OCR slots free up, so the document must stay open until done.
+        images = (
+            page.render(scale=OCR_RESOLUTION / 72, grayscale=True).to_pil()
+            for page in pdf
+        )
+        return text + _ocr_images(images)
+    finally:
+        pdf.close()
+
+
+def _extract_with_pdfplumber(pdf_stream: BinaryIO) -> str:
+    text = ""
 
-    if text.strip():
+    try:
+        pdf_stream.seek(0)
+        with pdfplumber.open(pdf_stream) as pdf:
+            # 1️⃣ Try text-based extraction
+            try:
+                for page in pdf.pages:
+                    page_text = page.extract_text()
+                    if page_text:
+                        text += page_text + "\n"
+            except Exception:
+                text = ""
+
+            if text.strip():
+                return text
+
+            # 2️⃣ OCR fallback (scanned PDFs). Render sequentially: pdfplumber
+            # is not thread-safe. Grayscale is a third of the RGB buffer, and
+            # tesseract binarizes internally anyway.
+            images = (
+                page.to_image(resolution=OCR_RESOLUTION).original.convert("L")
+                for page in pdf.pages
+            )
+            return text + _ocr_images(images)
+    except Exception:
         return text
 
-    # 2️⃣ OCR fallback (scanned PDFs)
+
+def _ocr_page(image: Image.Image) -> str:
     try:
-        with pdfplumber.open(io.BytesIO(file_bytes)) as pdf:
-            for page in pdf.pages:
-                image = page.to_image(resolution=300).original
-                ocr_text = pytesseract.image_to_string(image)
-                text += ocr_text + "\n"
+        return pytesseract.image_to_string(image)
+    finally:
+        image.close()
+
+
+def _ocr_images(images: Iterable[Image.Image]) -> str:
+    """
+    OCR rendered pages in parallel (on the shared _OCR_POOL), joined in
+    page order.
+    pytesseract runs the tesseract binary as a subprocess, so threads
+    overlap fully without pickling page images to a process pool.
+
+    Pages are pulled from the iterable only as OCR keeps up: at most
+    OCR_WORKERS pages are in flight, and each image is closed once read,
+    so a long scanned PDF never sits fully rendered in memory.
+    """
+    text = ""
+    pending = deque()
+
+    try:
+        for image in images:
+            pending.append(_OCR_POOL.submit(_ocr_page, image))
+            if len(pending) >= OCR_WORKERS:
+                text += pending.popleft().result() + "\n"
+        while pending:
+            text += pending.popleft().result() + "\n"
     except Exception:
         pass
 
@@ -116,6 +215,12 @@ def _extract_text_from_pdf(file_bytes: bytes) -> str:
 # Normalization & Cleaning
 # ------------------------------
 
+# Control characters [\x00-\x08\x0B-\x1F\x7F], deleted via str.translate
+_CTRL_TABLE = dict.fromkeys([*range(0x00, 0x09), *range(0x0B, 0x20), 0x7F])
+_NL_RE = re.compile(r"\n{3,}")
+_WS_RE = re.compile(r"[ \t]{2,}")
+
+
 def _normalize_text(text: str) -> str:
     """
     Clean and normalize extracted text:
@@ -131,13 +236,13 @@ def _normalize_text(text: str) -> str:
     text = text.replace("\r\n", "\n").replace("\r", "\n")
 
     # Remove control characters
-    text = re.sub(r"[\x00-\x08\x0B-\x1F\x7F]", "", text)
+    text = text.translate(_CTRL_TABLE)
 
     # Collapse excessive newlines
-    text = re.sub(r"\n{3,}", "\n\n", text)
+    text = _NL_RE.sub("\n\n", text)
 
     # Collapse excessive spaces
-    text = re.sub(r"[ \t]{2,}", " ", text)
+    text = _WS_RE.sub(" ", text)
 
     return text.strip()
 
@@ -15,11 +15,14 @@ NO generation
 
 from datetime import datetime
 from typing import Optional, List, Dict, Any
+import gzip
 import os
 
-from bson import ObjectId
+from bson import Binary, ObjectId
 from dotenv import load_dotenv
 
+from validators import is_object_id
+
 # ------------------------------
 # Environment & DB setup (shared single client)
 # ------------------------------
@@ -36,20 +39,37 @@ profiles_collection = db["profiles"]
 
 def _serialize_profile(doc: Dict[str, Any]) -> Dict[str, Any]:
     """
-    Convert MongoDB document to JSON-safe dict.
+    Convert MongoDB document to JSON-safe dict (in place: PyMongo returns
+    a fresh dict per document, so no copy is needed).
     """
     if not doc:
         return doc
 
-    doc = dict(doc)
     doc["_id"] = str(doc["_id"])
-    
-    # Convert datetime objects to ISO format strings
-    if "created_at" in doc and hasattr(doc["created_at"], "isoformat"):
-        doc["created_at"] = doc["created_at"].isoformat()
-    if "updated_at" in doc and hasattr(doc["updated_at"], "isoformat"):
-        doc["updated_at"] = doc["updated_at"].isoformat()
-    
+    unpack_raw_text(doc)
+
+    # created_at / updated_at stay datetime: the API's JSON provider
+    # writes them as ISO 8601 directly
+    return doc
+
+
+def pack_raw_text(profile_text: str) -> Binary:
+    """
+    gzip raw profile text for storage. Resume text compresses several
+    times over, shrinking profile inserts and their cache footprint.
+    """
+    return Binary(gzip.compress(profile_text.encode("utf-8"), compresslevel=6))
+
+
+def unpack_raw_text(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Replace a stored raw_text_gz field with the plain raw_text (in place),
+    so API responses keep their shape. Documents stored before compression
+    already carry raw_text and pass through unchanged.
+    """
+    packed = doc.pop("raw_text_gz", None)
+    if packed is not None:
+        doc["raw_text"] = gzip.decompress(packed).decode("utf-8")
     return doc
 
 
@@ -81,28 +101,72 @@ def create_profile(profile_document: Dict[str, Any]) -> Dict[str, Any]:
 # Read
 # ------------------------------
 
-def get_profile_by_id(profile_id: str) -> Optional[Dict[str, Any]]:
+def get_profile_by_id(
+    profile_id: str,
+    projection: Optional[Dict[str, Any]] = None
+) -> Optional[Dict[str, Any]]:
     """
     Fetch a profile by its ID.
+
+    projection optionally limits the fields fetched (full document when None).
     """
 
-    try:
-        oid = ObjectId(profile_id)
-    except Exception:
+    if not is_object_id(profile_id):
         return None
+    oid = ObjectId(profile_id)
 
-    doc = profiles_collection.find_one({"_id": oid})
+    doc = profiles_collection.find_one({"_id": oid}, projection)
     return _serialize_profile(doc)
 
 
+def get_profiles_by_ids(
+    profile_ids: List[str],
+    projection: Optional[Dict[str, Any]] = None
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Fetch several profiles in one round-trip ($in query).
+
+    Returns:
+        Profiles keyed by the requested ID strings; missing or malformed
+        IDs are absent
+    """
+
+    oids = {pid: ObjectId(pid) for pid in profile_ids if is_object_id(pid)}
+    if not oids:
+        return {}
+
+    cursor = profiles_collection.find({"_id": {"$in": list(set(oids.values()))}}, projection)
+    docs = {doc["_id"]: doc for doc in map(_serialize_profile, cursor)}
+    return {
+        pid: docs[str(oid)] for pid, oid in oids.items() if str(oid) in docs
+    }
+
+
+def get_raw_text(profile_id: str) -> Optional[str]:
+    """
+    Fetch only a profile's original text, decompressing on demand.
+
+    Returns None if the profile is missing or was stored without its text
+    (STORE_RAW_TEXT=false).
+    """
+
+    doc = get_profile_by_id(profile_id, {"raw_text": 1, "raw_text_gz": 1})
+    return doc.get("raw_text") if doc else None
+
+
+# List views leave out the original text (and so never decompress it);
+# fetch it per profile with get_profile_by_id or get_raw_text
+_LIST_PROJECTION = {"raw_text": 0, "raw_text_gz": 0}
+
+
 def list_profiles(limit: int = 20) -> List[Dict[str, Any]]:
     """
-    List recent profiles.
+    List recent profiles (without their raw text).
     """
 
     cursor = (
         profiles_collection
-        .find({})
+        .find({}, _LIST_PROJECTION)
         .sort("created_at", -1)
         .limit(limit)
     )
@@ -129,10 +193,9 @@ def update_profile(
         Updated profile or None if not found
     """
 
-    try:
-        oid = ObjectId(profile_id)
-    except Exception:
+    if not is_object_id(profile_id):
         return None
+    oid = ObjectId(profile_id)
 
     updates["updated_at"] = datetime.utcnow()
 
@@ -155,10 +218,9 @@ def delete_profile(profile_id: str) -> bool:
     Use sparingly; prefer logical deletion if needed later.
     """
 
-    try:
-        oid = ObjectId(profile_id)
-    except Exception:
+    if not is_object_id(profile_id):
         return False
+    oid = ObjectId(profile_id)
 
     result = profiles_collection.delete_one({"_id": oid})
     return result.deleted_count == 1
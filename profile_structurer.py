@@ -15,14 +15,16 @@ Uses:
 This is the FIRST MongoDB-touching intelligence module.
 """
 
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-import json
 import os
-from typing import Dict, Any
+from typing import Dict, Any, List
 
+import orjson
 from dotenv import load_dotenv
 
 from llm_adapter import call_llm_router
+from profile_repository import pack_raw_text
 
 # ------------------------------
 # Environment & DB setup (shared single client)
@@ -34,25 +36,15 @@ from db import db
 
 profiles_collection = db["profiles"]
 
+# The original profile text is stored gzip-compressed (raw_text_gz) and is
+# rarely read back; STORE_RAW_TEXT=false omits it entirely
+STORE_RAW_TEXT = os.environ.get("STORE_RAW_TEXT", "true").lower() != "false"
+
 # ------------------------------
 # LLM Prompt Template
 # ------------------------------
 
-PROFILE_STRUCTURING_PROMPT = """
-You are an expert resume analyst and information structuring engine.
-
-Your task:
-Convert the following unstructured profile text into a clean, structured JSON object.
-
-Rules (STRICT):
-- Output VALID JSON ONLY
-- Do NOT include explanations or markdown
-- If a section is missing, return an empty list []
-- Be concise but accurate
-- Do NOT invent information
-
-Required JSON schema:
-{
+PROFILE_JSON_SCHEMA = """{
   "personal": {
     "name": "",
     "email": "",
@@ -93,7 +85,23 @@ Required JSON schema:
     "linkedin": "",
     "portfolio": ""
   }
-}
+}"""
+
+PROFILE_STRUCTURING_PROMPT = """
+You are an expert resume analyst and information structuring engine.
+
+Your task:
+Convert the following unstructured profile text into a clean, structured JSON object.
+
+Rules (STRICT):
+- Output VALID JSON ONLY
+- Do NOT include explanations or markdown
+- If a section is missing, return an empty list []
+- Be concise but accurate
+- Do NOT invent information
+
+Required JSON schema:
+""" + PROFILE_JSON_SCHEMA + """
 
 Profile Text:
 ----------------
@@ -101,6 +109,44 @@ Profile Text:
 ----------------
 """
 
+# Several profiles in one call. The result is wrapped in an object because
+# Groq's JSON mode only returns top-level objects.
+PROFILE_BATCH_STRUCTURING_PROMPT = """
+You are an expert resume analyst and information structuring engine.
+
+Your task:
+Convert each of the {count} unstructured profile texts below into a clean, structured JSON object.
+
+Rules (STRICT):
+- Output VALID JSON ONLY
+- Do NOT include explanations or markdown
+- Return {"profiles": [...]} with exactly {count} elements; element i is Profile i
+- Never mix information between profiles
+- If a section is missing, return an empty list []
+- Be concise but accurate
+- Do NOT invent information
+
+Required JSON schema for EACH profile:
+""" + PROFILE_JSON_SCHEMA + """
+
+Profiles:
+{profiles}
+"""
+
+# Split once at import so each prompt is built with a single join
+_PROFILE_PROMPT_HEAD, _PROFILE_PROMPT_TAIL = PROFILE_STRUCTURING_PROMPT.split("{profile_text}")
+_BATCH_PROMPT_HEAD, _BATCH_PROMPT_TAIL = PROFILE_BATCH_STRUCTURING_PROMPT.split("{profiles}")
+
+# Batch limits: profiles per LLM call, and total profile text per call so
+# the prompt and the N-profile response stay inside the model's limits
+PROFILE_BATCH_SIZE = int(os.environ.get("PROFILE_BATCH_SIZE", "4"))
+PROFILE_BATCH_MAX_CHARS = int(os.environ.get("PROFILE_BATCH_MAX_CHARS", "24000"))
+
+# Max LLM calls in flight for one bulk request
+PROFILE_STRUCTURING_CONCURRENCY = int(
+    os.environ.get("PROFILE_STRUCTURING_CONCURRENCY", "4")
+)
+
 # ------------------------------
 # Public API
 # ------------------------------
@@ -123,11 +169,170 @@ def structure_and_store_profile(
     Raises:
         ValueError if structuring fails
     """
+    return structure_and_store_profiles_bulk([profile_text], source)[0]
+
+
+def structure_and_store_profiles_bulk(
+    profile_texts: List[str],
+    source: str = "manual"
+) -> List[Dict[str, Any]]:
+    """
+    Structure several profile texts and store them with a single
+    unordered insert_many (one round-trip instead of one per profile).
+    LLM calls run concurrently, at most PROFILE_STRUCTURING_CONCURRENCY
+    at a time.
+
+    Returns:
+        Stored profile documents, in input order
+
+    Raises:
+        ValueError if any structuring fails (nothing is stored)
+    """
+
+    if len(profile_texts) <= 1:
+        return _insert_profiles([
+            _build_profile_document(profile_text, source)
+            for profile_text in profile_texts
+        ], profile_texts)
+
+    workers = min(len(profile_texts), PROFILE_STRUCTURING_CONCURRENCY)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        profile_documents = list(pool.map(
+            lambda profile_text: _build_profile_document(profile_text, source),
+            profile_texts
+        ))
+    return _insert_profiles(profile_documents, profile_texts)
+
+
+def structure_and_store_profiles_batch(
+    profile_texts: List[str],
+    source: str = "manual"
+) -> List[Dict[str, Any]]:
+    """
+    Like structure_and_store_profiles_bulk, but structures several profiles
+    per LLM call (one prompt returning a JSON array), cutting the number of
+    round-trips and repeated prompt prefills.
+
+    Profiles are grouped by text length, so each call holds profiles of
+    similar size, and batches are capped by PROFILE_BATCH_SIZE and
+    PROFILE_BATCH_MAX_CHARS.
+
+    Returns:
+        Stored profile documents, in input order
+
+    Raises:
+        ValueError if any structuring fails (nothing is stored)
+    """
+
+    for profile_text in profile_texts:
+        if not profile_text or not isinstance(profile_text, str):
+            raise ValueError("Invalid profile text")
+
+    profile_documents = [None] * len(profile_texts)
+    for batch in _length_bucketed_batches(profile_texts):
+        if len(batch) == 1:
+            index = batch[0]
+            profile_documents[index] = _build_profile_document(profile_texts[index], source)
+            continue
+
+        structured_profiles = _structure_profile_batch([profile_texts[i] for i in batch])
+        for index, structured_profile in zip(batch, structured_profiles):
+            profile_documents[index] = _profile_document(
+                profile_texts[index], source, structured_profile
+            )
+
+    return _insert_profiles(profile_documents, profile_texts)
+
+
+def _insert_profiles(
+    profile_documents: List[Dict[str, Any]],
+    profile_texts: List[str]
+) -> List[Dict[str, Any]]:
+    """
+    Store profile documents with one unordered insert_many. The returned
+    documents carry the plain raw_text (from profile_texts, in the same
+    order) instead of the stored raw_text_gz.
+    """
+    if not profile_documents:
+        return []
+
+    result = profiles_collection.insert_many(profile_documents, ordered=False)
+    for profile_document, profile_text, inserted_id in zip(
+        profile_documents, profile_texts, result.inserted_ids
+    ):
+        profile_document["_id"] = str(inserted_id)
+        if profile_document.pop("raw_text_gz", None) is not None:
+            profile_document["raw_text"] = profile_text
+
+    return profile_documents
+
+
+def _length_bucketed_batches(profile_texts: List[str]) -> List[List[int]]:
+    """
+    Group profile indices into batches of similar text length, so a short
+    profile never waits on (or shares a response budget with) a long one.
+    """
+    batches = []
+    batch, batch_chars = [], 0
+    for index in sorted(range(len(profile_texts)), key=lambda i: len(profile_texts[i])):
+        text_chars = len(profile_texts[index])
+        if batch and (
+            len(batch) >= PROFILE_BATCH_SIZE
+            or batch_chars + text_chars > PROFILE_BATCH_MAX_CHARS
+        ):
+            batches.append(batch)
+            batch, batch_chars = [], 0
+        batch.append(index)
+        batch_chars += text_chars
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def _structure_profile_batch(profile_texts: List[str]) -> List[Dict[str, Any]]:
+    """Structure several profile texts with a single LLM call."""
+
+    count = str(len(profile_texts))
+    profiles = "\n".join(
+        f"Profile {i}:\n----------------\n{profile_text}\n----------------"
+        for i, profile_text in enumerate(profile_texts)
+    )
+    prompt = "".join((
+        _BATCH_PROMPT_HEAD.replace("{count}", count),
+        profiles,
+        _BATCH_PROMPT_TAIL
+    ))
+
+    raw_response = call_llm_router(
+        prompt=prompt,
+        task="profile_structuring",
+        use_simulation=False
+    )
+
+    try:
+        parsed = orjson.loads(raw_response)
+    except Exception as e:
+        raise ValueError(f"LLM returned invalid JSON: {e}")
+
+    structured_profiles = parsed.get("profiles") if isinstance(parsed, dict) else parsed
+    if not isinstance(structured_profiles, list) or len(structured_profiles) != len(profile_texts):
+        raise ValueError(
+            f"LLM returned a malformed profile batch "
+            f"(expected a list of {len(profile_texts)} profiles)"
+        )
+    if not all(isinstance(p, dict) for p in structured_profiles):
+        raise ValueError("Structured profile is not a JSON object")
+
+    return structured_profiles
+
+
+def _build_profile_document(profile_text: str, source: str) -> Dict[str, Any]:
+    """Structure one profile text via the LLM, returning the document to store."""
 
     if not profile_text or not isinstance(profile_text, str):
         raise ValueError("Invalid profile text")
 
-    prompt = PROFILE_STRUCTURING_PROMPT.replace("{profile_text}", profile_text)
+    prompt = "".join((_PROFILE_PROMPT_HEAD, profile_text, _PROFILE_PROMPT_TAIL))
 
 
     raw_response = call_llm_router(
@@ -137,7 +342,7 @@ def structure_and_store_profile(
     )
 
     try:
-        structured_profile = json.loads(raw_response)
+        structured_profile = orjson.loads(raw_response)
     except Exception as e:
         raise ValueError(f"LLM returned invalid JSON: {e}")
 
@@ -145,21 +350,24 @@ def structure_and_store_profile(
     if not isinstance(structured_profile, dict):
         raise ValueError("Structured profile is not a JSON object")
 
-    # Attach system metadata
+    return _profile_document(profile_text, source, structured_profile)
+
+
+def _profile_document(
+    profile_text: str,
+    source: str,
+    structured_profile: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Attach system metadata to a structured profile."""
+    now = datetime.utcnow()
     profile_document = {
         "source": source,
-        "raw_text": profile_text,
         "structured": structured_profile,
-        "created_at": datetime.utcnow(),
-        "updated_at": datetime.utcnow()
+        "created_at": now,
+        "updated_at": now
     }
-
-    result = profiles_collection.insert_one(profile_document)
-    profile_document["_id"] = str(result.inserted_id)
-    
-    # Convert datetime to ISO string for JSON serialization
-    profile_document["created_at"] = profile_document["created_at"].isoformat()
-    profile_document["updated_at"] = profile_document["updated_at"].isoformat()
+    if STORE_RAW_TEXT:
+        profile_document["raw_text_gz"] = pack_raw_text(profile_text)
 
     return profile_document
 
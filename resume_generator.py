@@ -10,18 +10,28 @@ Responsibilities:
 - Return JSON-serializable response
 """
 
+import asyncio
 import json
 import os
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from typing import Dict, List, Optional, Tuple
 
 
+import orjson
 from bson import ObjectId
 from dotenv import load_dotenv
 
-from llm_adapter import call_llm_router
-from profile_repository import get_profile_by_id
-from resume_schema import validate_resume_schema
+from llm_adapter import call_llm_router, acall_llm_router
+from profile_repository import get_profiles_by_ids
+from resume_schema import (
+    validate_resume_schema,
+    extract_text_for_matching,
+    extract_keywords,
+    SCHEMA_VERSION
+)
+from ats_analyzer import build_resume_tokens
 
 logger = logging.getLogger(__name__)
 
@@ -33,6 +43,9 @@ load_dotenv()
 from db import db
 resumes_collection = db["resumes"]
 
+# Max LLM calls in flight for one batch (sync or async)
+RESUME_GEN_CONCURRENCY = int(os.getenv("RESUME_GEN_CONCURRENCY", "4"))
+
 # -------------------------
 # LLM Prompt Template
 # -------------------------
@@ -132,6 +145,12 @@ Target Job Description:
 {job_description}
 """
 
+# Split once at import so each prompt is built with a single join, and
+# placeholder-like text inside the profile or JD is never substituted
+_RESUME_PROMPT_HEAD, _rest = RESUME_GENERATION_PROMPT.split("{profile_json}")
+_RESUME_PROMPT_MID, _RESUME_PROMPT_TAIL = _rest.split("{job_description}")
+del _rest
+
 # -------------------------
 # Core generator
 # -------------------------
@@ -150,23 +169,117 @@ def generate_resume_from_profile(profile_id: str, job_description: str | None =
     Raises:
         ValueError: If profile not found, LLM fails, or resume is malformed
     """
+    return generate_resumes_bulk([(profile_id, job_description)])[0]
 
-    profile = get_profile_by_id(profile_id)
-    if not profile:
-        raise ValueError("Profile not found")
 
-    structured_profile = profile.get("structured")
-    if not structured_profile:
-        raise ValueError("Profile has no structured data")
+def generate_resumes_bulk(
+    requests: List[Tuple[str, Optional[str]]]
+) -> List[Dict]:
+    """
+    Generate resumes for several (profile_id, job_description) pairs and
+    store them with a single unordered insert_many (one round-trip).
+    LLM calls run concurrently, at most RESUME_GEN_CONCURRENCY at a time.
+
+    Returns:
+        list[dict]: JSON-serializable resume documents, in request order
 
-    prompt = (
-        RESUME_GENERATION_PROMPT
-        .replace("{profile_json}", json.dumps(structured_profile, indent=2))
-        .replace(
-            "{job_description}",
-            job_description if job_description else "General entry-level software engineering role"
+    Raises:
+        ValueError: If any generation fails (nothing is stored)
+    """
+    profiles = _fetch_profiles(requests)
+
+    def build(request):
+        profile_id, job_description = request
+        return _build_resume_document(
+            profile_id, job_description, profiles.get(profile_id)
         )
-    )
+
+    if len(requests) <= 1:
+        documents = [build(request) for request in requests]
+    else:
+        workers = min(len(requests), RESUME_GEN_CONCURRENCY)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            documents = list(pool.map(build, requests))
+
+    return _store_resumes(requests, documents)
+
+
+async def agenerate_resume_from_profile(profile_id: str, job_description: str | None = None):
+    """Async generate_resume_from_profile: the LLM call doesn't block the loop."""
+    return (await agenerate_resumes_batch([profile_id], [job_description]))[0]
+
+
+async def agenerate_resumes_batch(
+    profile_ids: List[str],
+    job_descriptions: List[Optional[str]]
+) -> List[Dict]:
+    """
+    Async generate_resumes_bulk: LLM calls for the batch run concurrently
+    (at most RESUME_GEN_CONCURRENCY at a time), then one insert_many.
+
+    Raises:
+        ValueError: If the two lists differ in length, or any generation
+            fails (nothing is stored)
+    """
+    if len(profile_ids) != len(job_descriptions):
+        raise ValueError(
+            f"profile_ids and job_descriptions differ in length "
+            f"({len(profile_ids)} vs {len(job_descriptions)})"
+        )
+
+    requests = list(zip(profile_ids, job_descriptions))
+    profiles = await asyncio.to_thread(_fetch_profiles, requests)
+    semaphore = asyncio.Semaphore(RESUME_GEN_CONCURRENCY)
+
+    async def build(profile_id, job_description):
+        async with semaphore:
+            return await _abuild_resume_document(
+                profile_id, job_description, profiles.get(profile_id)
+            )
+
+    documents = await asyncio.gather(*[build(pid, jd) for pid, jd in requests])
+    return await asyncio.to_thread(_store_resumes, requests, documents)
+
+
+def _store_resumes(
+    requests: List[Tuple[str, Optional[str]]],
+    documents: List[Dict]
+) -> List[Dict]:
+    """Insert built resume documents and return the API responses."""
+    if not documents:
+        return []
+
+    # ✅ INSERT MUST HAPPEN FIRST
+    result = resumes_collection.insert_many(documents, ordered=False)
+    logger.info(f"[RESUME_GEN] Stored {len(result.inserted_ids)} resume(s)")
+
+    # ✅ THEN RETURN WITH resume_id
+    return [
+        {
+            "resume_id": str(inserted_id),
+            "profile_id": profile_id,
+            "resume": document["resume"],
+            # datetime: ISO 8601 via the API's JSON provider
+            "created_at": document["created_at"]
+        }
+        for (profile_id, _), document, inserted_id
+        in zip(requests, documents, result.inserted_ids)
+    ]
+
+
+def _fetch_profiles(requests: List[Tuple[str, Optional[str]]]) -> Dict[str, Dict]:
+    """Structured profiles for a whole batch in one MongoDB round-trip."""
+    return get_profiles_by_ids([pid for pid, _ in requests], {"structured": 1})
+
+
+def _build_resume_document(
+    profile_id: str,
+    job_description: str | None,
+    profile: Optional[Dict]
+) -> Dict:
+    """Generate and validate one resume, returning the document to store."""
+
+    structured_profile, prompt = _resume_prompt(profile, job_description)
 
     llm_response = call_llm_router(
         prompt=prompt,
@@ -174,9 +287,71 @@ def generate_resume_from_profile(profile_id: str, job_description: str | None =
         use_simulation=False
     )
 
+    return _resume_document_from_response(
+        profile_id, job_description, structured_profile, llm_response
+    )
+
+
+async def _abuild_resume_document(
+    profile_id: str,
+    job_description: str | None,
+    profile: Optional[Dict]
+) -> Dict:
+    """Async _build_resume_document: the LLM call doesn't block the loop."""
+
+    structured_profile, prompt = _resume_prompt(profile, job_description)
+
+    llm_response = await acall_llm_router(
+        prompt=prompt,
+        task="resume_generation",
+        use_simulation=False
+    )
+
+    return _resume_document_from_response(
+        profile_id, job_description, structured_profile, llm_response
+    )
+
+
+def _resume_prompt(profile: Optional[Dict], job_description: str | None) -> Tuple[Dict, str]:
+    """Check the fetched profile and build the generation prompt."""
+
+    if not profile:
+        raise ValueError("Profile not found")
+
+    structured_profile = profile.get("structured")
+    if not structured_profile:
+        raise ValueError("Profile has no structured data")
+
+    # Whitespace-normalized JD: the same JD pasted with different spacing
+    # builds the same prompt, and so hits the LLM gateway's prompt cache
+    jd_text = (
+        " ".join(job_description.split()) if job_description
+        else "General entry-level software engineering role"
+    )
+
+    prompt = "".join((
+        _RESUME_PROMPT_HEAD,
+        # Compact: indentation only costs prompt tokens
+        orjson.dumps(structured_profile).decode(),
+        _RESUME_PROMPT_MID,
+        jd_text,
+        _RESUME_PROMPT_TAIL
+    ))
+
+    return structured_profile, prompt
+
+
+def _resume_document_from_response(
+    profile_id: str,
+    job_description: str | None,
+    structured_profile: Dict,
+    llm_response: str
+) -> Dict:
+    """Parse and validate the LLM output into the resume document to store."""
+
     try:
-        resume_json = json.loads(llm_response)
-    except json.JSONDecodeError as e:
+        resume_json = orjson.loads(llm_response)
+    except orjson.JSONDecodeError as e:
         logger.error(f"[RESUME_GEN] LLM returned invalid JSON: {llm_response[:200]}")
         raise ValueError(f"LLM did not return valid JSON: {e}")
 
@@ -215,27 +390,24 @@ def generate_resume_from_profile(profile_id: str, job_description: str | None =
       logger.error(f"[RESUME_GEN] Received resume: {json.dumps(resume_json, indent=2)[:500]}")
       raise
 
+    # Matching text, built once: feeds both the JD alignment check and the
+    # ATS token precompute below
+    resume_text = extract_text_for_matching(resume_json)
 
     # -------------------------
     # ENFORCE JD KEYWORD ALIGNMENT
     # Extract JD keywords and verify at least one appears in the resume
     # -------------------------
     if job_description:
-      from resume_schema import extract_text_for_matching, _extract_keywords
-
       try:
-        # Extract resume text using canonical method
-        resume_text = extract_text_for_matching(resume_json)
-
         # Extract JD keywords
-        jd_keywords = _extract_keywords(job_description)
+        jd_keywords = extract_keywords(job_description)
 
         if jd_keywords:
-          # Check if ANY JD keyword appears in resume text
-          resume_text_normalized = resume_text.lower()
-          matched_keywords = [kw for kw in jd_keywords if kw in resume_text_normalized]
-
-          if not matched_keywords:
+          # Check if ANY JD keyword appears in resume text (already lowercased
+          # by extract_text_for_matching). Substring test per keyword, driven
+          # from C via the bound __contains__; stops at the first match
+          if not any(map(resume_text.__contains__, jd_keywords)):
             error_msg = (
               f"[RESUME_GEN] CRITICAL: ATS keyword alignment failure!\n"
               f"JD keywords extracted: {jd_keywords[:10]}\n"
@@ -249,31 +421,31 @@ def generate_resume_from_profile(profile_id: str, job_description: str | None =
               f"This indicates incomplete resume generation."
             )
 
-          logger.info(
-            f"[RESUME_GEN] ✓ ATS alignment check passed: {len(matched_keywords)} keywords matched"
-          )
-          logger.info(f"[RESUME_GEN] Matched keywords: {matched_keywords}")
+          logger.info("[RESUME_GEN] ✓ ATS alignment check passed")
+          if logger.isEnabledFor(logging.DEBUG):
+            matched_keywords = list(filter(resume_text.__contains__, jd_keywords))
+            logger.debug(
+              "[RESUME_GEN] Matched %d keywords: %s", len(matched_keywords), matched_keywords
+            )
       except Exception as e:
         logger.error(f"[RESUME_GEN] Failed to validate ATS alignment: {e}")
         raise ValueError(f"ATS alignment validation failed: {e}")
 
-    # Build document
+    # Build document (tagged with the schema version it was validated against)
+    now = datetime.utcnow()
     resume_document = {
         "profile_id": ObjectId(profile_id),
         "job_description": job_description,
         "resume": resume_json,
-        "created_at": datetime.utcnow()
+        "schema_version": SCHEMA_VERSION,
+        "validated_at": now,
+        "created_at": now
     }
 
-    # ✅ INSERT MUST HAPPEN FIRST
-    result = resumes_collection.insert_one(resume_document)
-    logger.info(f"[RESUME_GEN] Stored resume {result.inserted_id}")
+    # Precompute ATS tokens so analysis skips text normalization
+    resume_tokens = build_resume_tokens(resume_json, resume_text)
+    if resume_tokens:
+        resume_document["resume_tokens"] = resume_tokens
 
-    # ✅ THEN RETURN WITH resume_id
-    return {
-        "resume_id": str(result.inserted_id),
-        "profile_id": profile_id,
-        "resume": resume_json,
-        "created_at": resume_document["created_at"].isoformat()
-    }
+    return resume_document
 
@@ -13,21 +13,26 @@ CRITICAL INVARIANTS (NON-NEGOTIABLE):
 """
 
 import os
+import asyncio
+import importlib.util
 import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
+from functools import lru_cache
 from typing import Dict, Any, Tuple
 from io import BytesIO
 from bson import ObjectId
 from dotenv import load_dotenv
+from pymongo import WriteConcern
 import pdfkit
 
-from resume_schema import validate_resume_schema
+import pdf_worker
+from resume_schema import validate_resume_schema, SCHEMA_VERSION
+from validators import is_object_id
 from html import escape
-# Keep an optional import for WeasyPrint to satisfy tests that look for it.
-try:
-    from weasyprint import HTML
-except Exception:
-    HTML = None
 
 logger = logging.getLogger(__name__)
 
@@ -39,18 +44,23 @@ load_dotenv()
 from db import db
 
 resumes_collection = db["resumes"]
-rendered_collection = db["rendered_resumes"]
+# Fire-and-forget writes: render metadata is purely observational
+rendered_collection = db.get_collection(
+    "rendered_resumes",
+    write_concern=WriteConcern(w=0)
+)
 
 # ==============================
 # HTML Template
 # ==============================
 
-def render_html(resume: Dict[str, Any]) -> str:
+def render_html(resume: Dict[str, Any], skip_validation: bool = False) -> str:
     """
     Render ATS-safe HTML from canonical resume JSON.
     
     CRITICAL ASSERTIONS:
-    - Resume must match canonical schema
+    - Resume must match canonical schema (skip_validation only for resumes
+      already validated against the current SCHEMA_VERSION)
     - HTML body must be > 500 chars
     - If empty/malformed → raise ValueError
     
@@ -67,12 +77,15 @@ def render_html(resume: Dict[str, Any]) -> str:
     logger.info(f"[RENDER] Starting HTML generation")
 
     # ✅ VALIDATE SCHEMA FIRST
-    try:
-        validate_resume_schema(resume)
-        logger.info(f"[RENDER] Resume schema validation passed")
-    except ValueError as e:
-        logger.error(f"[RENDER] Resume schema validation failed: {e}")
-        raise
+    if skip_validation:
+        logger.info(f"[RENDER] Resume already validated (schema {SCHEMA_VERSION})")
+    else:
+        try:
+            validate_resume_schema(resume)
+            logger.info(f"[RENDER] Resume schema validation passed")
+        except ValueError as e:
+            logger.error(f"[RENDER] Resume schema validation failed: {e}")
+            raise
 
     def section(title: str, body: str) -> str:
         """Helper to create HTML section."""
@@ -166,11 +179,12 @@ li {
     # ✅ Skills (required)
     skills = resume.get("skills", [])
     if skills:
-        skills_html = ""
+        # Fragments are collected and joined once (no quadratic str +=)
+        parts = []
         for skill in skills:
             if isinstance(skill, str):
                 # Plain string skill
-                skills_html += f"<p class='category'>{skill}</p>"
+                parts.append(f"<p class='category'>{skill}</p>")
             elif isinstance(skill, dict):
                 # Skill dict with category and items
                 category = skill.get("category", "")
@@ -178,8 +192,9 @@ li {
                 if category and items:
                     items_str = ", ".join([str(i) for i in items if i])
                     if items_str:
-                        skills_html += f"<p class='category'>{category}:</p><p>{items_str}</p>"
+                        parts.append(f"<p class='category'>{category}:</p><p>{items_str}</p>")
 
+        skills_html = "".join(parts)
         if skills_html:
             body_parts.append(section("Skills", skills_html))
             logger.info(f"[RENDER] Added skills section")
@@ -187,7 +202,7 @@ li {
     # ✅ Experience (optional but valuable)
     experience = resume.get("experience", [])
     if experience:
-        exp_html = ""
+        parts = []
         for exp in experience:
             if isinstance(exp, dict):
                 role = exp.get("role", "")
@@ -203,15 +218,14 @@ li {
                     if duration:
                         exp_header += f" ({duration})"
 
-                    exp_html += f"<p>{exp_header}</p>"
+                    parts.append(f"<p>{exp_header}</p>")
 
                     if bullets:
-                        exp_html += "<ul>"
-                        for bullet in bullets:
-                            if bullet:
-                                exp_html += f"<li>{bullet}</li>"
-                        exp_html += "</ul>"
+                        parts.append("<ul>")
+                        parts.extend([f"<li>{bullet}</li>" for bullet in bullets if bullet])
+                        parts.append("</ul>")
 
+        exp_html = "".join(parts)
         if exp_html:
             body_parts.append(section("Experience", exp_html))
             logger.info(f"[RENDER] Added experience section")
@@ -219,7 +233,7 @@ li {
     # ✅ Projects (optional)
     projects = resume.get("projects", [])
     if projects:
-        proj_html = ""
+        parts = []
         for proj in projects:
             if isinstance(proj, dict):
                 title = proj.get("title", "")
@@ -227,19 +241,18 @@ li {
                 technologies = proj.get("technologies", [])
 
                 if title:
-                    proj_html += f"<p><strong>{title}</strong></p>"
+                    parts.append(f"<p><strong>{title}</strong></p>")
 
                     if bullets:
-                        proj_html += "<ul>"
-                        for bullet in bullets:
-                            if bullet:
-                                proj_html += f"<li>{bullet}</li>"
-                        proj_html += "</ul>"
+                        parts.append("<ul>")
+                        parts.extend([f"<li>{bullet}</li>" for bullet in bullets if bullet])
+                        parts.append("</ul>")
 
                     if technologies:
                         tech_str = ", ".join([str(t) for t in technologies if t])
-                        proj_html += f"<p><em>Tech:</em> {tech_str}</p>"
+                        parts.append(f"<p><em>Tech:</em> {tech_str}</p>")
 
+        proj_html = "".join(parts)
         if proj_html:
             body_parts.append(section("Projects", proj_html))
             logger.info(f"[RENDER] Added projects section")
@@ -247,7 +260,7 @@ li {
     # ✅ Education (optional)
     education = resume.get("education", [])
     if education:
-        edu_html = ""
+        parts = []
         for edu in education:
             if isinstance(edu, dict):
                 degree = edu.get("degree", "")
@@ -260,15 +273,16 @@ li {
                         edu_entry += f", {institution}"
                     if year:
                         edu_entry += f" ({year})"
-                    edu_html += f"<p>{edu_entry}</p>"
+                    parts.append(f"<p>{edu_entry}</p>")
 
+        edu_html = "".join(parts)
         if edu_html:
             body_parts.append(section("Education", edu_html))
             logger.info(f"[RENDER] Added education section")
 
     # Finalize HTML
     body_content = "".join(body_parts)
-    html += body_content + "</body></html>"
+    html = "".join((html, body_content, "</body></html>"))
 
     # ✅ CRITICAL ASSERTION: Ensure HTML has meaningful content
     body_length = len(body_content)
@@ -292,6 +306,100 @@ li {
 # PDF Conversion (pdfkit/wkhtmltopdf)
 # ==============================
 
+# wkhtmltopdf binary; set WKHTMLTOPDF_PATH on Linux hosts/containers
+WKHTMLTOPDF_PATH = os.environ.get(
+    "WKHTMLTOPDF_PATH",
+    r"C:\Program Files\wkhtmltopdf\bin\wkhtmltopdf.exe"
+)
+
+_PDFKIT_OPTIONS = {
+    'quiet': '',
+    'margin-top': '0.5in',
+    'margin-bottom': '0.5in',
+    'margin-left': '0.5in',
+    'margin-right': '0.5in',
+    'print-media-type': None,
+}
+
+
+@lru_cache(maxsize=1)
+def _pdfkit_config():
+    """
+    pdfkit configuration, built once per process (it locates the binary).
+    Built on first use rather than at import, since pdfkit raises when the
+    binary is missing and WeasyPrint may be handling every render.
+    """
+    return pdfkit.configuration(wkhtmltopdf=WKHTMLTOPDF_PATH)
+
+
+# WeasyPrint renders run in persistent worker processes: fonts stay loaded
+# between renders and CPU-heavy layout doesn't hold the web worker's GIL
+PDF_WORKERS = int(os.environ.get("PDF_WORKERS", "2"))
+# A render that takes longer is abandoned (its worker is killed) and the
+# request falls back to pdfkit, well inside gunicorn's worker timeout
+PDF_RENDER_TIMEOUT = float(os.environ.get("PDF_RENDER_TIMEOUT", "60"))
+
+# Set USE_WEASYPRINT=0 on pdfkit-only hosts to skip WeasyPrint entirely
+USE_WEASYPRINT = os.environ.get("USE_WEASYPRINT", "1") == "1"
+
+
+@lru_cache(maxsize=1)
+def _weasyprint_available() -> bool:
+    """
+    Whether renders should go to the WeasyPrint pool. Only probes that the
+    package is installed: the web process never imports WeasyPrint (Pango,
+    cairo, fonts) itself, the pool workers do.
+    """
+    return USE_WEASYPRINT and importlib.util.find_spec("weasyprint") is not None
+
+
+_pdf_pool_executor = None
+_pdf_pool_lock = threading.Lock()
+
+
+def _pdf_pool() -> ProcessPoolExecutor:
+    """
+    The shared WeasyPrint pool, created on first use (under a lock, so
+    concurrent first renders don't each build one).
+
+    Workers are spawned, not forked: the web process has live MongoDB and
+    executor threads. Under gunicorn (app:app) a spawned worker imports only
+    pdf_worker. Under `python app.py`, spawn re-imports app.py as
+    __mp_main__, so each worker also runs the app's startup (MongoDB
+    client, init_db) once.
+    """
+    global _pdf_pool_executor
+    pool = _pdf_pool_executor
+    if pool is None:
+        with _pdf_pool_lock:
+            if _pdf_pool_executor is None:
+                _pdf_pool_executor = ProcessPoolExecutor(
+                    max_workers=PDF_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=pdf_worker.init_worker
+                )
+            pool = _pdf_pool_executor
+    return pool
+
+
+def _discard_pdf_pool(pool: ProcessPoolExecutor) -> None:
+    """
+    Retire a broken or hung pool: the next render builds a fresh one.
+    Workers are terminated, since a hung layout would otherwise keep
+    running and hold its slot.
+    """
+    global _pdf_pool_executor
+    with _pdf_pool_lock:
+        if _pdf_pool_executor is pool:
+            _pdf_pool_executor = None
+
+    # Snapshot before shutdown(), which drops the executor's process table
+    processes = list((getattr(pool, "_processes", None) or {}).values())
+    pool.shutdown(wait=False, cancel_futures=True)
+    for process in processes:
+        process.terminate()
+
+
 def html_to_pdf(html: str) -> bytes:
     """
     Convert HTML to PDF using pdfkit (wkhtmltopdf) with proper styling.
@@ -314,12 +422,20 @@ def html_to_pdf(html: str) -> bytes:
 
     logger.info(f"[RENDER] Starting PDF conversion ({len(html)} chars HTML)")
 
-    # Prefer WeasyPrint when available (tests and some environments expect it)
-    if HTML is not None:
+    # Prefer WeasyPrint when available and enabled
+    if _weasyprint_available():
         try:
             logger.info("[RENDER] Starting PDF conversion with WeasyPrint")
-            # Use WeasyPrint to render PDF from HTML
-            pdf_bytes = HTML(string=html).write_pdf()
+            # Use WeasyPrint (in the worker pool) to render PDF from HTML
+            pool = _pdf_pool()
+            try:
+                pdf_bytes = pool.submit(pdf_worker.render_pdf, html).result(
+                    timeout=PDF_RENDER_TIMEOUT
+                )
+            except (BrokenProcessPool, FutureTimeoutError):
+                # A worker died or hung; replace the pool for the next render
+                _discard_pdf_pool(pool)
+                raise
             if not pdf_bytes:
                 raise ValueError("WeasyPrint returned empty PDF bytes")
             logger.info(f"[RENDER] WeasyPrint PDF conversion successful ({len(pdf_bytes)} bytes)")
@@ -334,17 +450,11 @@ def html_to_pdf(html: str) -> bytes:
     # If WeasyPrint not available or failed, use pdfkit (wkhtmltopdf)
     if PDF_BYTES_FALLBACK is None:
         try:
-            config = pdfkit.configuration(wkhtmltopdf=r'C:\Program Files\wkhtmltopdf\bin\wkhtmltopdf.exe')
-            options = {
-                'quiet': '',
-                'margin-top': '0.5in',
-                'margin-bottom': '0.5in',
-                'margin-left': '0.5in',
-                'margin-right': '0.5in',
-                'print-media-type': None,
-            }
-
-            pdf_bytes = pdfkit.from_string(html, False, options=options, configuration=config)
+            pdf_bytes = pdfkit.from_string(
+                html, False,
+                options=_PDFKIT_OPTIONS,
+                configuration=_pdfkit_config()
+            )
 
             if not pdf_bytes:
                 raise ValueError("pdfkit returned empty PDF bytes")
@@ -400,8 +510,15 @@ def render_resume_pdf(resume_id: str) -> Tuple[bytes, str]:
     logger.info(f"[RENDER] Starting render_resume_pdf({resume_id})")
 
     # ✅ Fetch resume document
+    if not is_object_id(resume_id):
+        raise ValueError(f"Invalid resume ID format: {resume_id!r}")
+
     try:
-        resume_doc = resumes_collection.find_one({"_id": ObjectId(resume_id)})
+        # Only the canonical resume is rendered; skip tokens/JD/metadata
+        resume_doc = resumes_collection.find_one(
+            {"_id": ObjectId(resume_id)},
+            projection={"resume": 1, "schema_version": 1}
+        )
     except Exception as e:
         raise ValueError(f"Invalid resume ID format: {e}")
 
@@ -422,7 +539,12 @@ def render_resume_pdf(resume_id: str) -> Tuple[bytes, str]:
 
     # ✅ Generate HTML with validation
     try:
-        html = render_html(resume_json)
+        # Resumes validated at generation time against the current schema
+        # version skip re-validation; older documents are checked again
+        html = render_html(
+            resume_json,
+            skip_validation=resume_doc.get("schema_version") == SCHEMA_VERSION
+        )
     except ValueError as e:
         logger.error(f"[RENDER] HTML rendering failed: {e}")
         raise
@@ -453,3 +575,14 @@ def render_resume_pdf(resume_id: str) -> Tuple[bytes, str]:
     logger.info(f"[RENDER] Render complete: {filename} ({len(pdf_bytes)} bytes)")
 
     return pdf_bytes, filename
+
+
+async def arender_resume_pdf(resume_id: str) -> Tuple[bytes, str]:
+    """
+    Async render_resume_pdf for event-loop callers.
+
+    The MongoDB fetch, HTML build and PDF conversion all block, so the
+    whole render runs in a worker thread (one hop instead of one per
+    step). WeasyPrint itself already runs in the PDF process pool.
+    """
+    return await asyncio.to_thread(render_resume_pdf, resume_id)
@@ -10,41 +10,61 @@ from dotenv import load_dotenv
 load_dotenv()
 
 from db import db
+from validators import is_object_id
 
 resumes_collection = db["resumes"]
 
+# Query policy: fetch only the fields a caller needs. Prefer find() with a
+# projection over an aggregation; when a pipeline is unavoidable, put the
+# $match first and $project right after it, so later stages ($group,
+# $sort, ...) handle small documents.
+
+# Used when callers pass no projection: everything except internal fields.
+# resume_tokens (the precomputed ATS token list) is only read by the ATS
+# analyzer, which asks for it explicitly.
+DEFAULT_PROJECTION = {"resume_tokens": 0}
+
 
 def _serialize_resume(doc):
     """
-    Convert MongoDB document to JSON-safe dict.
+    Convert MongoDB document to JSON-safe dict (in place: PyMongo returns
+    a fresh dict per document, so no copy is needed).
     """
     if not doc:
         return doc
-    
-    doc = dict(doc)
+
     if "_id" in doc:
         doc["_id"] = str(doc["_id"])
-    if "profile_id" in doc and hasattr(doc["profile_id"], "__str__") and str(type(doc["profile_id"])) == "<class 'bson.objectid.ObjectId'>":
+    if isinstance(doc.get("profile_id"), ObjectId):
         doc["profile_id"] = str(doc["profile_id"])
-    
-    # Convert datetime objects to ISO format strings
-    if "created_at" in doc and hasattr(doc["created_at"], "isoformat"):
-        doc["created_at"] = doc["created_at"].isoformat()
-    
+
+    # created_at stays datetime (ISO 8601 via the API's JSON provider)
     return doc
 
 
-def get_resume_by_id(resume_id: str):
+def get_resume_by_id(resume_id: str, projection=None):
     """
     Fetch a resume document by ID.
 
     Args:
         resume_id (str): Resume MongoDB ObjectId as string
+        projection (dict | None): Optional MongoDB projection to limit
+            the fields fetched, e.g. {"resume.header": 1} for the header
+            only (DEFAULT_PROJECTION when None)
 
     Returns:
         dict | None
     """
+    # Malformed IDs (the common bad-input case) skip the ObjectId exception path
+    if not is_object_id(resume_id):
+        return None
+
     try:
-        return _serialize_resume(resumes_collection.find_one({"_id": ObjectId(resume_id)}))
+        return _serialize_resume(
+            resumes_collection.find_one(
+                {"_id": ObjectId(resume_id)},
+                DEFAULT_PROJECTION if projection is None else projection
+            )
+        )
     except Exception:
         return None
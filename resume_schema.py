@@ -9,8 +9,9 @@ All modules (generation, ATS, PDF) must use ONLY this schema.
 Any deviation = immediate exception (no silent fallbacks).
 """
 
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime
+from functools import lru_cache
 import re
 
 
@@ -18,97 +19,108 @@ import re
 # KEYWORD EXTRACTION (For ATS Alignment)
 # ==========================================
 
-def _extract_keywords(text: str) -> List[str]:
+_KEEP_CHARS = frozenset("abcdefghijklmnopqrstuvwxyz0123456789")
+
+
+class _NormalizeTable(dict):
+    """
+    str.translate table mapping every char outside [a-z0-9\\s] to a space.
+    The ASCII range is built up front; any other code point maps to a space
+    without being stored, so the table never grows with input. (Non-ASCII
+    whitespace becomes a plain space, which splits tokens the same way.)
+    """
+
+    def __init__(self):
+        super().__init__()
+        for codepoint in range(0x80):
+            char = chr(codepoint)
+            self[codepoint] = codepoint if char in _KEEP_CHARS or char.isspace() else 0x20
+
+    def __missing__(self, codepoint: int) -> int:
+        return 0x20
+
+
+_NORMALIZE_TABLE = _NormalizeTable()
+
+# Texts this long or longer bypass the lru_caches below, so a few huge
+# inputs can't pin large strings in memory
+_CACHE_MAX_TEXT_CHARS = 64_000
+
+# Very common stopwords removed from keywords
+_STOPWORDS = frozenset({
+    "and", "or", "the", "a", "an", "to", "for", "with",
+    "of", "in", "on", "at", "by", "from", "is", "are",
+    "as", "this", "that", "will", "be", "we", "you", "your",
+    "that's", "it's", "can", "could", "would", "should",
+    "have", "has", "do", "does", "did", "don", "doesn"
+})
+
+
+def normalize_tokens(text: str) -> List[str]:
+    """
+    Lowercase text, map every char outside [a-z0-9\\s] to a space and split
+    into tokens (a table lookup per char, in C; split() collapses the runs).
+    """
+    return text.lower().translate(_NORMALIZE_TABLE).split()
+
+
+def extract_keywords(text: str) -> List[str]:
     """
     Extract potential ATS keywords from text (JD or resume).
     Returns list of unique keywords (3+ chars, non-stopword).
     """
-    text = text.lower()
-    # Replace non-alphanumeric with spaces
-    text = re.sub(r"[^a-z0-9\s]", " ", text)
-    # Collapse multiple spaces
-    text = re.sub(r"\s+", " ", text)
-    
-    words = text.split()
-
-    # Remove very common stopwords
-    stopwords = {
-        "and", "or", "the", "a", "an", "to", "for", "with",
-        "of", "in", "on", "at", "by", "from", "is", "are",
-        "as", "this", "that", "will", "be", "we", "you", "your",
-        "that's", "it's", "can", "could", "would", "should",
-        "have", "has", "do", "does", "did", "don", "doesn"
-    }
+    # The same JD is typically used for many candidates: tokenize it once
+    if len(text) < _CACHE_MAX_TEXT_CHARS:
+        return list(_cached_keywords(text))
+    return list(_cached_keywords.__wrapped__(text))
 
-    keywords = [w for w in words if len(w) > 2 and w not in stopwords]
-    return list(set(keywords))
+
+@lru_cache(maxsize=1024)
+def _cached_keywords(text: str) -> Tuple[str, ...]:
+    """Keyword extraction behind extract_keywords (cached, immutable result)."""
+    words = normalize_tokens(text)
+
+    # Dedupe first (in C, keeping text order) so the Python-level filter
+    # only visits unique tokens
+    return tuple(
+        w for w in dict.fromkeys(words)
+        if len(w) > 2 and w not in _STOPWORDS
+    )
 
 
 # ==========================================
 # CANONICAL RESUME SCHEMA (STRICT)
 # ==========================================
 
-def validate_resume_schema(resume: Dict[str, Any]) -> None:
-    """
-    STRICT validation: Ensures resume matches canonical schema.
-    
-    Raises:
-        ValueError: If resume is missing required fields or has wrong structure
-    
-    Canonical structure:
-    {
-        "summary": str (required, non-empty),
-        "skills": List[str] (required, at least 1),
-        "experience": List[Dict] (required, can be empty),
-        "projects": List[Dict] (optional, can be empty),
-        "education": List[Dict] (optional, can be empty)
-    }
-    """
-    
-    # ✅ Null/empty checks
-    if not resume:
-        raise ValueError("Resume is empty or None")
-    
-    if not isinstance(resume, dict):
-        raise ValueError(f"Resume must be a dict, got {type(resume)}")
-    
-    # ✅ Required: header (personal information)
-    if "header" not in resume:
-        raise ValueError("Resume missing required field: 'header'")
+# Bump whenever validate_resume_schema's rules change: stored resumes
+# tagged with an older version are re-validated before use
+SCHEMA_VERSION = "v1"
 
-    header = resume.get("header")
-    if not isinstance(header, dict):
-        raise ValueError(f"'header' must be an object, got {type(header)}")
+# Optional string fields of header / experience / education entries,
+# shared by validation and ATS text extraction
+_HEADER_STRING_FIELDS = ("email", "phone", "location")
+_EXP_KEYS = ("role", "organization", "duration")
+_EDU_KEYS = ("degree", "institution", "year")
 
+
+def _check_header(header: Dict[str, Any]) -> None:
     # header.name must be present and non-empty
     name = header.get("name")
     if not isinstance(name, str) or not name.strip():
         raise ValueError("'header.name' is required and must be a non-empty string")
 
     # other header fields if present must be strings
-    for f in ["email", "phone", "location"]:
+    for f in _HEADER_STRING_FIELDS:
         if f in header and header[f] is not None and not isinstance(header[f], str):
             raise ValueError(f"'header.{f}' must be a string if present")
 
-    # ✅ Required: summary
-    if "summary" not in resume:
-        raise ValueError("Resume missing required field: 'summary'")
-    
-    summary = resume.get("summary")
-    if not isinstance(summary, str):
-        raise ValueError(f"'summary' must be string, got {type(summary)}")
-    
+
+def _check_summary(summary: str) -> None:
     if not summary.strip():
         raise ValueError("'summary' cannot be empty")
-    
-    # ✅ Required: skills (at least 1)
-    if "skills" not in resume:
-        raise ValueError("Resume missing required field: 'skills'")
-    
-    skills = resume.get("skills")
-    if not isinstance(skills, list):
-        raise ValueError(f"'skills' must be a list, got {type(skills)}")
-    
+
+
+def _check_skills(skills: List[Any]) -> None:
     # Skills can be strings OR dicts with "items" field
     for i, skill in enumerate(skills):
         if isinstance(skill, str):
@@ -130,46 +142,81 @@ def validate_resume_schema(resume: Dict[str, Any]) -> None:
         for s in skills
     ):
         raise ValueError("Resume must have at least 1 skill")
-    
-    # ✅ Optional: experience (can be empty, but must be list)
-    if "experience" not in resume:
-        raise ValueError("Resume missing required field: 'experience'")
-    
-    experience = resume.get("experience")
-    if not isinstance(experience, list):
-        raise ValueError(f"'experience' must be a list, got {type(experience)}")
-    
+
+
+def _check_experience(experience: List[Any]) -> None:
     for i, exp in enumerate(experience):
         if not isinstance(exp, dict):
             raise ValueError(f"'experience[{i}]' must be dict, got {type(exp)}")
         
         # Check required exp fields if present
-        for field in ["role", "organization", "duration"]:
+        for field in _EXP_KEYS:
             if field in exp and not isinstance(exp[field], str):
                 raise ValueError(f"'experience[{i}].{field}' must be string")
         
         if "bullets" in exp and not isinstance(exp["bullets"], list):
             raise ValueError(f"'experience[{i}].bullets' must be list")
+
+
+def _check_dict_items(name: str):
+    """Element check for list sections whose entries must be objects."""
+    def check(entries: List[Any]) -> None:
+        for i, entry in enumerate(entries):
+            if not isinstance(entry, dict):
+                raise ValueError(f"'{name}[{i}]' must be dict, got {type(entry)}")
+    return check
+
+
+# Top-level fields in validation order:
+# (field, required, expected type, type name for errors, content check)
+_RESUME_FIELDS = (
+    ("header", True, dict, "an object", _check_header),
+    ("summary", True, str, "string", _check_summary),
+    ("skills", True, list, "a list", _check_skills),
+    ("experience", True, list, "a list", _check_experience),
+    ("projects", False, list, "a list", _check_dict_items("projects")),
+    ("education", False, list, "a list", _check_dict_items("education")),
+)
+
+
+def validate_resume_schema(resume: Dict[str, Any]) -> None:
+    """
+    STRICT validation: Ensures resume matches canonical schema.
     
-    # ✅ Optional: projects
-    if "projects" in resume:
-        projects = resume.get("projects")
-        if not isinstance(projects, list):
-            raise ValueError(f"'projects' must be a list, got {type(projects)}")
-        
-        for i, proj in enumerate(projects):
-            if not isinstance(proj, dict):
-                raise ValueError(f"'projects[{i}]' must be dict, got {type(proj)}")
+    Raises:
+        ValueError: If resume is missing required fields or has wrong structure
     
-    # ✅ Optional: education
-    if "education" in resume:
-        education = resume.get("education")
-        if not isinstance(education, list):
-            raise ValueError(f"'education' must be a list, got {type(education)}")
-        
-        for i, edu in enumerate(education):
-            if not isinstance(edu, dict):
-                raise ValueError(f"'education[{i}]' must be dict, got {type(edu)}")
+    Canonical structure:
+    {
+        "summary": str (required, non-empty),
+        "skills": List[str] (required, at least 1),
+        "experience": List[Dict] (required, can be empty),
+        "projects": List[Dict] (optional, can be empty),
+        "education": List[Dict] (optional, can be empty)
+    }
+
+    Driven by _RESUME_FIELDS: one loop checks presence and type of each
+    top-level field, then runs its content check.
+    """
+    
+    # ✅ Null/empty checks
+    if not resume:
+        raise ValueError("Resume is empty or None")
+    
+    if not isinstance(resume, dict):
+        raise ValueError(f"Resume must be a dict, got {type(resume)}")
+
+    for field, required, expected, type_name, check in _RESUME_FIELDS:
+        if field not in resume:
+            if required:
+                raise ValueError(f"Resume missing required field: '{field}'")
+            continue
+
+        value = resume[field]
+        if not isinstance(value, expected):
+            raise ValueError(f"'{field}' must be {type_name}, got {type(value)}")
+
+        check(value)
 
 
 def canonicalize_skills(skills: List[Any]) -> List[str]:
@@ -181,24 +228,41 @@ def canonicalize_skills(skills: List[Any]) -> List[str]:
     - {"category": "Languages", "items": ["Python", "JavaScript"]} 
       → ["Python", "JavaScript"]
     """
-    result = []
-    
+    # Strip each string once; empty results are dropped
+    return [token for token in _iter_skill_tokens(skills) if token]
+
+
+def _iter_skill_tokens(skills: List[Any]):
+    """Yield the stripped skill strings behind canonicalize_skills."""
     for skill in skills:
         if isinstance(skill, str):
-            if skill.strip():
-                result.append(skill.strip())
+            yield skill.strip()
         elif isinstance(skill, dict):
             # Try extracting items list
             if "items" in skill and isinstance(skill["items"], list):
                 for item in skill["items"]:
-                    if isinstance(item, str) and item.strip():
-                        result.append(item.strip())
+                    if isinstance(item, str):
+                        yield item.strip()
             # Also add category if present
             if "category" in skill and isinstance(skill["category"], str):
-                if skill["category"].strip():
-                    result.append(skill["category"].strip())
-    
-    return result
+                yield skill["category"].strip()
+
+
+# Multi-word skill -> unigram-friendly tokens appended for ATS matching
+_ATS_EXPANSIONS = {
+    "machine learning": "machine learning",
+    "artificial intelligence": "artificial intelligence ai",
+    "web development": "web development",
+    "data science": "data science",
+    "computer vision": "computer vision",
+}
+# One scan finds every phrase present, however many phrases there are. The
+# zero-width lookahead consumes nothing, so findall() reports a phrase at
+# every position, including ones overlapping another phrase's match.
+_ATS_EXPANSION_RE = re.compile(
+    "(?=(" + "|".join(map(re.escape, _ATS_EXPANSIONS)) + "))"
+)
+
 
 def normalize_for_ats(text: str) -> str:
     """
@@ -209,19 +273,23 @@ def normalize_for_ats(text: str) -> str:
     if not isinstance(text, str):
         return ""
 
-    expansions = {
-        "machine learning": ["machine", "learning"],
-        "artificial intelligence": ["artificial", "intelligence", "ai"],
-        "web development": ["web", "development"],
-        "data science": ["data", "science"],
-        "computer vision": ["computer", "vision"],
-    }
+    # Batch scoring normalizes the same texts repeatedly
+    if len(text) < _CACHE_MAX_TEXT_CHARS:
+        return _expand_for_ats(text)
+    return _expand_for_ats.__wrapped__(text)
 
-    for phrase, tokens in expansions.items():
-        if phrase in text:
-            text += " " + " ".join(tokens)
 
-    return text
+@lru_cache(maxsize=256)
+def _expand_for_ats(text: str) -> str:
+    """Phrase expansion behind normalize_for_ats (cached)."""
+    found = set(_ATS_EXPANSION_RE.findall(text))
+    if not found:
+        return text
+
+    # Appended in table order, as the per-phrase scans did
+    return " ".join([text, *(
+        tokens for phrase, tokens in _ATS_EXPANSIONS.items() if phrase in found
+    )])
 
 
 def extract_text_for_matching(resume: Dict[str, Any]) -> str:
@@ -236,58 +304,69 @@ def extract_text_for_matching(resume: Dict[str, Any]) -> str:
     Returns:
         Normalized text string (lowercased, spaces normalized)
     """
-    parts = []
+    # Each part is lowercased and whitespace-collapsed as it is produced, so
+    # the whole text is built by a single join (whitespace-only parts dropped)
+    return " ".join(filter(None, (
+        " ".join(part.lower().split()) for part in _iter_parts(resume)
+    )))
+
+
+def _iter_parts(resume: Dict[str, Any]):
+    """Yield the resume text fields used for ATS matching, in order."""
     # Include header fields (name, location) for matching context, but DO NOT include email/phone
     header = resume.get("header", {})
     if isinstance(header, dict):
         if header.get("name"):
-            parts.append(str(header.get("name")))
+            yield str(header["name"])
         if header.get("location"):
-            parts.append(str(header.get("location")))
+            yield str(header["location"])
     
     # Summary
     if resume.get("summary"):
-        parts.append(resume["summary"])
+        yield resume["summary"]
     
     # Skills (flatten both string and dict formats)
     for skill in resume.get("skills", []):
         if isinstance(skill, str):
-            parts.append(skill)
+            yield skill
         elif isinstance(skill, dict):
             if skill.get("category"):
-                parts.append(str(skill["category"]))
+                yield str(skill["category"])
             if skill.get("items"):
-                parts.extend([str(i) for i in skill["items"] if i])
+                yield from map(str, filter(None, skill["items"]))
     
+    # Entry loops bind each entry's get once and read every field a single
+    # time (no get-then-index double lookup)
+
     # Experience
     for exp in resume.get("experience", []):
         if isinstance(exp, dict):
-            for key in ["role", "organization", "duration"]:
-                if exp.get(key):
-                    parts.append(str(exp[key]))
-            if exp.get("bullets"):
-                parts.extend([str(b) for b in exp["bullets"] if b])
+            get = exp.get
+            for key in _EXP_KEYS:
+                value = get(key)
+                if value:
+                    yield str(value)
+            bullets = get("bullets")
+            if bullets:
+                yield from map(str, filter(None, bullets))
     
     # Projects
     for proj in resume.get("projects", []):
         if isinstance(proj, dict):
-            if proj.get("title"):
-                parts.append(str(proj["title"]))
-            if proj.get("bullets"):
-                parts.extend([str(b) for b in proj["bullets"] if b])
-            if proj.get("technologies"):
-                parts.extend([str(t) for t in proj["technologies"] if t])
+            get = proj.get
+            title = get("title")
+            if title:
+                yield str(title)
+            for key in ("bullets", "technologies"):
+                values = get(key)
+                if values:
+                    yield from map(str, filter(None, values))
     
     # Education
     for edu in resume.get("education", []):
         if isinstance(edu, dict):
-            for key in ["degree", "institution", "year"]:
-                if edu.get(key):
-                    parts.append(str(edu[key]))
-    
-    # Normalize
-    text = " ".join(parts).lower()
-    # Collapse multiple spaces
-    text = " ".join(text.split())
-    
-    return text
+            get = edu.get
+            for key in _EDU_KEYS:
+                value = get(key)
+                if value:
+                    yield str(value)
@@ -1,5 +1,6 @@
 from pathlib import Path
-import uuid
+from typing import BinaryIO, Optional, Union
+import os
 
 UPLOAD_DIR = Path("uploads")
 UPLOAD_DIR.mkdir(exist_ok=True)
@@ -7,19 +8,61 @@ UPLOAD_DIR.mkdir(exist_ok=True)
 MAX_PDF_SIZE = 5 * 1024 * 1024   # 5 MB
 MAX_TXT_SIZE = 1 * 1024 * 1024   # 1 MB
 
-def save_upload(file_bytes: bytes, original_name: str) -> Path:
-    ext = Path(original_name).suffix.lower()
+_ALLOWED_EXT = frozenset({".pdf", ".txt"})
+# Per-type limit and the error raised when an upload exceeds it
+_SIZE_LIMIT = {
+    ".pdf": (MAX_PDF_SIZE, "PDF exceeds 5 MB size limit"),
+    ".txt": (MAX_TXT_SIZE, "TXT exceeds 1 MB size limit"),
+}
 
-    if ext == ".pdf" and len(file_bytes) > MAX_PDF_SIZE:
-        raise ValueError("PDF exceeds 5 MB size limit")
+# Streamed uploads are copied in fixed-size chunks, never held whole in RAM
+_COPY_CHUNK_SIZE = 64 * 1024
 
-    if ext == ".txt" and len(file_bytes) > MAX_TXT_SIZE:
-        raise ValueError("TXT exceeds 1 MB size limit")
 
-    if ext not in [".pdf", ".txt"]:
+def save_upload(
+    source: Union[bytes, BinaryIO],
+    original_name: str,
+    size_hint: Optional[int] = None
+) -> Path:
+    """
+    Store an upload as bytes or as a readable binary stream (e.g. a
+    werkzeug FileStorage.stream). Streams are checked against the size
+    limit while copying; size_hint (e.g. Content-Length) rejects early.
+    """
+    ext = Path(original_name).suffix.lower()
+    if ext not in _ALLOWED_EXT:
         raise ValueError("Unsupported file type")
 
-    file_id = uuid.uuid4().hex
+    limit, size_error = _SIZE_LIMIT[ext]
+    size = len(source) if isinstance(source, (bytes, bytearray)) else size_hint
+    if size is not None and size > limit:
+        raise ValueError(size_error)
+
+    # 128 random bits as 32 hex chars, without building a UUID object
+    file_id = os.urandom(16).hex()
     path = UPLOAD_DIR / f"{file_id}{ext}"
-    path.write_bytes(file_bytes)
+
+    if isinstance(source, (bytes, bytearray)):
+        path.write_bytes(source)
+        return path
+
+    _copy_stream(source, path, limit, size_error)
     return path
+
+
+def _copy_stream(source: BinaryIO, path: Path, limit: int, error: str) -> None:
+    """Copy a stream to path chunk by chunk, removing the file on overflow."""
+    written = 0
+    try:
+        with path.open("wb") as out:
+            while True:
+                chunk = source.read(_COPY_CHUNK_SIZE)
+                if not chunk:
+                    break
+                written += len(chunk)
+                if written > limit:
+                    raise ValueError(error)
+                out.write(chunk)
+    except BaseException:
+        path.unlink(missing_ok=True)
+        raise
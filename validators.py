@@ -1,7 +1,20 @@
+import re
+
+# 24 hex chars: the only string form bson.ObjectId accepts
+_OID_RE = re.compile(r"[0-9a-fA-F]{24}")
+
+# Surrounding whitespace tolerated before a raw length is rejected
+# without stripping (strip() would copy the whole oversized string)
+_WHITESPACE_SLACK = 1024
+
+
 def validate_text_field(text: str, name: str, min_len=20, max_len=20_000):
     if not isinstance(text, str):
         raise ValueError(f"{name} must be a string")
 
+    if len(text) > max_len + _WHITESPACE_SLACK:
+        raise ValueError(f"{name} is too long")
+
     stripped = text.strip()
     if len(stripped) < min_len:
         raise ValueError(f"{name} is too short")
@@ -10,3 +23,8 @@ def validate_text_field(text: str, name: str, min_len=20, max_len=20_000):
         raise ValueError(f"{name} is too long")
 
     return stripped
+
+
+def is_object_id(value) -> bool:
+    """Cheap check that a string id can be converted with ObjectId()."""
+    return isinstance(value, str) and _OID_RE.fullmatch(value) is not None